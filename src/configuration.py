@@ -1,12 +1,17 @@
 import os
-from typing import Any
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Literal
 from langchain_core.runnables import RunnableConfig
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Configuration(BaseModel):
     """Main configuration class for the Drama/Gossip Research agent."""
 
+    # Resolved configurations are cached and shared, so they must not change
+    model_config = ConfigDict(frozen=True)
+
     llm_model: str = Field(
         default="google_genai:gemini-2.5-flash",
         description="Primary LLM model",
@@ -30,6 +35,101 @@ class Configuration(BaseModel):
     # 恢復到正常的 5 次，給它足夠空間思考
     max_tool_iterations: int = Field(default=5)
     max_chunks: int = Field(default=3)
+    # Local pre-filter in front of the chunk classifier: scores at or below
+    # reject_below are irrelevant, at or above accept_above relevant, the rest go to the LLM
+    chunk_prefilter_enabled: bool = Field(default=True)
+    chunk_prefilter_reject_below: float = Field(default=0.1)
+    chunk_prefilter_accept_above: float = Field(default=0.6)
+    # Chunk classifier: calls in flight, and chunks per call (1 = one chunk per prompt)
+    chunk_classifier_concurrency: int = Field(default=4)
+    chunk_classifier_batch_size: int = Field(default=1)
+    # 3000 tokens 確保有足夠上下文判斷研究結果
+    extraction_chunk_tokens: int = Field(default=3000)
+    # Candidate chunks per source page; tokenization stops there
+    max_chunks_per_page: int = Field(default=4)
+    # Chunks sent to extraction per research call, the most claim-relevant (BM25) first
+    max_extraction_chunks: int = Field(default=8)
+    # "structure" packs headings/paragraphs/sentences; "tokens" cuts every N tokens
+    chunk_strategy: Literal["structure", "tokens"] = Field(default="structure")
+
+    # Shared HTTP connection pool used for scraping
+    http_max_connections: int = Field(default=100)
+    http_max_connections_per_host: int = Field(default=10)
+    http_dns_cache_ttl: int = Field(default=300)
+    http_keepalive_timeout: float = Field(default=30.0)
+    http_timeout: float = Field(default=30.0)
+
+    # On-disk cache of scraped page content
+    bypass_scrape_cache: bool = Field(default=False)
+    scrape_cache_path: str = Field(default=".cache/scrape_cache.sqlite")
+    scrape_cache_ttl_seconds: int = Field(default=86400)
+    scrape_cache_max_mb: int = Field(default=256)
+
+    # Search backend: "tavily" (web) or "local" (SQLite FTS5 index over a directory)
+    search_backend: str = Field(default="tavily")
+    search_corpus_dir: str = Field(default="")
+    search_corpus_index_path: str = Field(default=".cache/search_corpus.sqlite")
+
+    # In-memory cache of web search results
+    bypass_search_cache: bool = Field(default=False)
+    search_cache_ttl_seconds: int = Field(default=3600)
+    search_cache_max_entries: int = Field(default=1024)
+
+    # Use page text returned by the search API instead of scraping when long enough
+    use_search_raw_content: bool = Field(default=True)
+    min_raw_content_length: int = Field(default=1500)
+
+    # Source ranking: skip sources below the score, extract from the top N per call
+    min_source_score: float = Field(default=0.2)
+    max_sources_per_call: int = Field(default=6)
+
+    # Comma-separated scraper backends, tried in order until one returns content
+    scraper_backends: str = Field(default="firecrawl,direct")
+
+    # Skip pages that are near-duplicates (SimHash) of one already extracted
+    # in the same research run
+    skip_near_duplicates: bool = Field(default=True)
+    near_duplicate_max_distance: int = Field(default=3)
+
+    # Crawl scheduling: global cap, per-domain cap and request rate
+    crawl_max_concurrency: int = Field(default=8)
+    crawl_per_domain_concurrency: int = Field(default=2)
+    crawl_requests_per_second: float = Field(default=5.0)
+    crawl_burst: int = Field(default=5)
+
+    # Persistent LLM response cache (opt-in), keyed by model, prompt and schema
+    llm_cache_enabled: bool = Field(default=False)
+    llm_cache_path: str = Field(default=".cache/llm_cache.sqlite")
+    llm_cache_ttl_seconds: int = Field(default=7 * 86400)
+    llm_cache_max_mb: int = Field(default=256)
+
+    # LLM governor: per-provider budgets shared by every LLM call in the process.
+    # Defaults apply to each provider; llm_provider_limits overrides them as
+    # "provider=requests_per_minute/tokens_per_minute/max_concurrency,..."
+    llm_governor_enabled: bool = Field(default=True)
+    llm_requests_per_minute: int = Field(default=600)
+    llm_tokens_per_minute: int = Field(default=2_000_000)
+    llm_max_concurrency: int = Field(default=16)
+    llm_provider_limits: str = Field(default="")
+
+    # LLM retries: backoff for rate limits, timeouts and server errors, then
+    # fail over to these comma-separated models in order
+    llm_retry_base_delay: float = Field(default=1.0)
+    llm_retry_max_delay: float = Field(default=60.0)
+    llm_fallback_models: str = Field(default="")
+
+    # Model cascades per task, cheapest first: "task=model>model,task=model>model".
+    # A later model is only called when the earlier call fails (after local
+    # repair) or its answer fails the task's check.
+    # Tasks: extraction, classification, report
+    llm_cascades: str = Field(default="")
+
+    # CPU-bound text work (tokenizing, normalizing, fingerprinting) runs in a pool
+    cpu_executor: Literal["thread", "process"] = Field(default="thread")
+    cpu_max_workers: int = Field(default=4)
+    cpu_max_pending: int = Field(default=32)
+    # Warn when the event loop is blocked for longer than this (0 disables)
+    loop_lag_warn_ms: float = Field(default=250.0)
 
     def get_llm_structured_model(self) -> str:
         return self.structured_llm_model or self.llm_model
@@ -37,16 +137,88 @@ class Configuration(BaseModel):
     def get_llm_with_tools_model(self) -> str:
         return self.tools_llm_model or self.llm_model
 
+    def get_scraper_backends(self) -> list[str]:
+        """Return the scraper backend names, in the order they are tried."""
+        return [b.strip() for b in self.scraper_backends.split(",") if b.strip()]
+
+    def get_llm_fallback_models(self) -> list[str]:
+        """Return the models to fail over to, in order."""
+        return [m.strip() for m in self.llm_fallback_models.split(",") if m.strip()]
+
+    def get_llm_provider_limits(self) -> Dict[str, tuple[int, int, int]]:
+        """Parse per-provider "name=rpm/tpm/concurrency" overrides."""
+        limits = {}
+        for entry in self.llm_provider_limits.split(","):
+            if not entry.strip():
+                continue
+            provider, _, values = entry.partition("=")
+            rpm, tpm, concurrency = (int(v) for v in values.split("/"))
+            limits[provider.strip()] = (rpm, tpm, concurrency)
+        return limits
+
     def get_llm_chunk_model(self) -> str:
-        return "google_genai:gemini-2.5-flash"
+        return self.chunk_llm_model or self.llm_model
+
+    def get_llm_cascade(self, task: str) -> list[str]:
+        """Return the cheap-to-strong model cascade for `task`, or [] if none."""
+        for entry in self.llm_cascades.split(","):
+            name, _, models = entry.partition("=")
+            if name.strip() == task:
+                return [m.strip() for m in models.split(">") if m.strip()]
+        return []
 
     @classmethod
     def from_runnable_config(
         cls, config: RunnableConfig | None = None
     ) -> "Configuration":
+        """Resolve the configuration for a run: environment first, then `configurable`.
+
+        Nodes and per-chunk helpers call this many times with the same
+        values, so resolved configurations are memoized by the values they
+        were built from, environment overrides included. The environment is
+        re-read on every call, so changing a variable takes effect at once.
+        """
         configurable = config.get("configurable", {}) if config else {}
+        env = _env_overrides(cls)
         values = {
-            k: os.environ.get(k.upper(), configurable.get(k))
-            for k in cls.model_fields.keys()
+            k: v
+            for k, v in configurable.items()
+            if k in cls.model_fields and k not in env and v is not None
         }
-        return cls(**{k: v for k, v in values.items() if v is not None})
+
+        try:
+            key = (cls, frozenset(env.items()), frozenset(values.items()))
+            hash(key)
+        except TypeError:
+            return cls(**env, **values)
+
+        with _resolved_lock:
+            resolved = _resolved.get(key)
+            if resolved is not None:
+                _resolved.move_to_end(key)
+                return resolved
+
+        resolved = cls(**env, **values)
+        with _resolved_lock:
+            _resolved[key] = resolved
+            while len(_resolved) > _RESOLVED_MAX_ENTRIES:
+                _resolved.popitem(last=False)
+        return resolved
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forget memoized configurations."""
+        with _resolved_lock:
+            _resolved.clear()
+
+
+def _env_overrides(cls: type[Configuration]) -> Dict[str, Any]:
+    """Field values set through environment variables (FIELD_NAME in upper case)."""
+    return {
+        k: os.environ[k.upper()] for k in cls.model_fields if k.upper() in os.environ
+    }
+
+
+_RESOLVED_MAX_ENTRIES = 128
+_resolved: "OrderedDict[tuple, Configuration]" = OrderedDict()
+_resolved_lock = threading.Lock()
@@ -0,0 +1,217 @@
+"""Local repair of malformed or truncated JSON from model output."""
+
+import ast
+import json
+import re
+import typing
+from typing import Any, Dict, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+_CLOSERS = {"{": "}", "[": "]"}
+# How many earlier cut points to try on badly truncated output
+_MAX_CUTS = 64
+
+repair_stats: Dict[str, int] = {
+    "parsed": 0,
+    "repaired": 0,
+    "dropped_items": 0,
+    "failed": 0,
+}
+
+
+def _scan(text: str) -> Tuple[str, List[str], List[Tuple[int, Tuple[str, ...]]]]:
+    """Clean `text` in one pass, tracking open brackets and safe cut points.
+
+    Returns the cleaned text, the brackets still open at its end (a truncated
+    string is closed), and (offset, open brackets) pairs at which the text so
+    far holds only complete elements.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = escaped = False
+
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+            out.append(char)
+            cuts.append((len(out), tuple(stack)))
+            continue
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()  # trailing comma
+            if stack:
+                stack.pop()
+            out.append(char)
+            cuts.append((len(out), tuple(stack)))
+            if not stack:
+                break  # ignore whatever the model wrote after the value
+            continue
+        elif char == ",":
+            cuts.append((len(out), tuple(stack)))
+        out.append(char)
+
+    if escaped:
+        out.pop()
+    if in_string:
+        out.append('"')
+    return "".join(out), stack, cuts
+
+
+def _closed(text: str, stack) -> str:
+    text = text.rstrip().rstrip(",")
+    return text + "".join(_CLOSERS[b] for b in reversed(stack))
+
+
+def _json_like(value: Any) -> bool:
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _json_like(v) for k, v in value.items())
+    if isinstance(value, list):
+        return all(_json_like(v) for v in value)
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        pass
+    # Python reprs: single quotes, True/False/None
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        raise ValueError("not JSON") from None
+    if not _json_like(value):
+        raise ValueError("not JSON")  # e.g. a half-written object read as a set
+    return value
+
+
+def repair_json(text: str) -> Any:
+    """Parse model output as JSON, repairing what a strict parser rejects.
+
+    Handles code fences, prose around the value, trailing commas, literal
+    newlines in strings, single-quoted Python reprs and output truncated by
+    the token limit (open strings and brackets are closed, and a dangling
+    key or half-written element is dropped). Raises ValueError when nothing
+    usable remains.
+    """
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON value in model output")
+    text = text[min(starts) :]
+
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        pass
+
+    cleaned, stack, cuts = _scan(text)
+    candidates = [_closed(cleaned, stack)]
+    candidates += [
+        _closed(cleaned[:end], open_) for end, open_ in cuts[::-1][:_MAX_CUTS]
+    ]
+    for candidate in candidates:
+        try:
+            return _loads(candidate)
+        except ValueError:
+            continue
+    raise ValueError("could not repair JSON in model output")
+
+
+def parse_tool_args(args: Any) -> Dict[str, Any]:
+    """Tool call arguments as a dict; some providers send them as a JSON string."""
+    if isinstance(args, dict):
+        return args
+    if isinstance(args, str):
+        try:
+            parsed = repair_json(args)
+        except ValueError:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+    return {}
+
+
+def _model_type(annotation: Any) -> Type[BaseModel] | None:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def _list_item_type(annotation: Any) -> Any | None:
+    if typing.get_origin(annotation) in (list, List):
+        args = typing.get_args(annotation)
+        return args[0] if args else Any
+    return None
+
+
+def validate_with_salvage(schema: Type[BaseModel], data: Any) -> BaseModel:
+    """Validate `data` against `schema`, keeping whatever parts are valid.
+
+    Stringified nested JSON is parsed, a bare list is accepted for a schema
+    with a single list field, and invalid items of model lists are dropped
+    instead of failing the whole response. Raises ValidationError if the
+    result is still invalid.
+    """
+    list_fields = [
+        name
+        for name, field in schema.model_fields.items()
+        if _list_item_type(field.annotation) is not None
+    ]
+    if isinstance(data, list) and len(list_fields) == 1:
+        data = {list_fields[0]: data}
+
+    try:
+        return schema.model_validate(data)
+    except ValidationError:
+        if not isinstance(data, dict):
+            raise
+
+    fixed = dict(data)
+    for name, field in schema.model_fields.items():
+        value = fixed.get(name)
+        item_type = _list_item_type(field.annotation)
+        nested = _model_type(field.annotation)
+
+        if isinstance(value, str) and (item_type is not None or nested):
+            try:
+                value = repair_json(value)
+            except ValueError:
+                continue
+            fixed[name] = value
+
+        if nested and isinstance(value, dict):
+            try:
+                fixed[name] = validate_with_salvage(nested, value)
+            except ValidationError:
+                pass
+        elif _model_type(item_type) and isinstance(value, list):
+            kept = []
+            for item in value:
+                try:
+                    kept.append(validate_with_salvage(item_type, item))
+                except (ValidationError, TypeError):
+                    continue
+            if len(kept) < len(value):
+                repair_stats["dropped_items"] += len(value) - len(kept)
+            fixed[name] = kept
+
+    return schema.model_validate(fixed)
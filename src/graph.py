@@ -1,5 +1,4 @@
 # src/graph.py
-import json
 import uuid
 from typing import Literal
 
@@ -9,7 +8,12 @@ from langgraph.graph import START, StateGraph, END
 from langgraph.types import Command
 
 from src.configuration import Configuration
-from src.llm_service import create_llm_with_tools, create_llm_structured_model
+from src.core.json_repair import parse_tool_args
+from src.llm_service import (
+    PRIORITY_HIGH,
+    create_llm_cascade_model,
+    create_llm_with_tools,
+)
 from src.prompts import (
     lead_researcher_prompt,
     structure_events_prompt,
@@ -37,7 +41,10 @@ async def supervisor_node(
 ) -> Command[Literal["supervisor_tools"]]:
     """The 'brain' of the agent."""
     tools = [ResearchEventsTool, FinishResearchTool, think_tool]
-    tools_model = create_llm_with_tools(tools=tools, config=config)
+    # The supervisor goes ahead of bulk extraction when the provider is busy
+    tools_model = create_llm_with_tools(
+        tools=tools, config=config, priority=PRIORITY_HIGH
+    )
 
     messages = state.get("conversation_history", [])
     last_message = messages[-1] if messages else ""
@@ -97,17 +104,17 @@ async def supervisor_tools_node(
     # 用於累加這一輪新發現的證據
     newly_found_evidence = []
 
+    # Canonical URLs already scraped in this run, shared by every research call
+    visited_urls = set(state.get("visited_urls") or set())
+    page_fingerprints = dict(state.get("page_fingerprints") or {})
+
     for tool_call in last_message.tool_calls:
         tool_name = tool_call.get("name")
         tool_args = tool_call.get("args")
         tool_id = tool_call.get("id")
 
-        # JSON 解析保護
-        if isinstance(tool_args, str):
-            try:
-                tool_args = json.loads(tool_args)
-            except:
-                tool_args = {}
+        # JSON 解析保護: args may arrive as a (possibly truncated) JSON string
+        tool_args = parse_tool_args(tool_args)
 
         if tool_name == "FinishResearchTool":
             return Command(goto="structure_events")
@@ -130,10 +137,13 @@ async def supervisor_tools_node(
                     {
                         "research_question": research_question,
                         "target_urls": [],
-                        "processed_urls": [],
+                        "processed_urls": visited_urls,
+                        "page_fingerprints": page_fingerprints,
                         "gathered_events": [],
                     }
                 )
+                visited_urls = set(result.get("processed_urls") or visited_urls)
+                page_fingerprints = result.get("page_fingerprints") or page_fingerprints
 
                 # 子圖回傳的是 RawEvent 列表
                 raw_events = result.get("gathered_events", [])
@@ -177,10 +187,19 @@ async def supervisor_tools_node(
         update={
             "conversation_history": all_tool_messages,
             "evidence_points": updated_evidence,  # [UPDATED] Key Update
+            "visited_urls": visited_urls,
+            "page_fingerprints": page_fingerprints,
         },
     )
 
 
+def _is_sourced_report(report: FactCheckReport) -> bool:
+    """Return whether a report has evidence and every point cites its source."""
+    return bool(report and report.evidence_points) and all(
+        point.source_url for point in report.evidence_points
+    )
+
+
 async def structure_events(
     state: SupervisorState, config: RunnableConfig
 ) -> Command[Literal["__end__"]]:
@@ -209,8 +228,8 @@ async def structure_events(
 
     # 2. 調用 LLM 生成最終 JSON
     # 使用 FactCheckReport 結構
-    structured_llm = create_llm_structured_model(
-        config=config, class_name=FactCheckReport
+    structured_llm = create_llm_cascade_model(
+        "report", config, FactCheckReport, check=_is_sourced_report
     )
 
     try:
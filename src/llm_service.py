@@ -1,10 +1,32 @@
-from typing import List, Type
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Tuple, Type
 
 from langchain.chat_models import init_chat_model
-from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import (
+    Runnable,
+    RunnableConfig,
+    RunnableLambda,
+    ensure_config,
+)
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from src.configuration import Configuration
+from src.core.json_repair import repair_json, repair_stats, validate_with_salvage
+from src.loop_local import LoopLocalRegistry
+from src.sqlite_cache import SQLiteCache
 from src.utils import get_api_key_for_model
 
 configurable_model = init_chat_model(
@@ -12,6 +34,438 @@ configurable_model = init_chat_model(
 )
 
 
+# Smaller token limit and fewer retries for chunk processing
+CHUNK_MAX_TOKENS = 1024
+CHUNK_MAX_RETRIES = 2
+
+# Built chains, keyed by everything that goes into them. Building a chain
+# (bind_tools / with_structured_output / with_retry / with_config) is not
+# free, and the same few chains are requested for every chunk and node.
+_RUNNABLE_CACHE_MAX_ENTRIES = 64
+_runnable_cache: "OrderedDict[tuple, Runnable]" = OrderedDict()
+_runnable_cache_lock = threading.Lock()
+runnable_cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+def _tool_key(tool) -> str:
+    return getattr(tool, "name", None) or getattr(tool, "__name__", repr(tool))
+
+
+def _cached_runnable(key: tuple, build: Callable[[], Runnable]) -> Runnable:
+    """Return the chain cached under `key`, building it on first use."""
+    with _runnable_cache_lock:
+        runnable = _runnable_cache.get(key)
+        if runnable is not None:
+            _runnable_cache.move_to_end(key)
+            runnable_cache_stats["hits"] += 1
+            return runnable
+
+    runnable = build()
+    with _runnable_cache_lock:
+        runnable_cache_stats["misses"] += 1
+        _runnable_cache[key] = runnable
+        while len(_runnable_cache) > _RUNNABLE_CACHE_MAX_ENTRIES:
+            _runnable_cache.popitem(last=False)
+    return runnable
+
+
+def clear_runnable_cache() -> None:
+    """Forget every built chain and reset the hit/miss counters."""
+    with _runnable_cache_lock:
+        _runnable_cache.clear()
+        runnable_cache_stats.update(hits=0, misses=0)
+
+
+# --- Rate limiting ---
+# Lower numbers are served first when a provider's budget is exhausted
+PRIORITY_HIGH = 0  # supervisor / interactive decisions
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2  # per-chunk extraction and classification
+
+
+def provider_of(model_name: str) -> str:
+    """Return the provider prefix of a model name, e.g. "openai" for "openai:gpt-4o"."""
+    return model_name.split(":", 1)[0] if ":" in model_name else model_name
+
+
+def estimate_tokens(input: Any, max_tokens: int) -> int:
+    """Rough token cost of a call: ~4 characters per prompt token plus the output cap."""
+    return len(_render_input(input)) // 4 + max_tokens
+
+
+class ProviderBudget:
+    """Requests/minute, tokens/minute and concurrency budget for one provider.
+
+    Callers queue by priority and are admitted strictly in that order once
+    the budget allows, so a burst waits here instead of turning into 429s.
+    """
+
+    def __init__(
+        self, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int
+    ):
+        """Start with the full budget; every limit is at least 1."""
+        self.requests_per_minute = max(1, requests_per_minute)
+        self.tokens_per_minute = max(1, tokens_per_minute)
+        self.max_concurrency = max(1, max_concurrency)
+        self.stats: Dict[str, float] = {
+            "granted": 0,
+            "waited": 0,
+            "wait_seconds": 0.0,
+            "peak_queue": 0,
+        }
+        self._requests = float(self.requests_per_minute)
+        self._tokens = float(self.tokens_per_minute)
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(
+            self.requests_per_minute,
+            self._requests + elapsed * self.requests_per_minute / 60,
+        )
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + elapsed * self.tokens_per_minute / 60,
+        )
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order while the budget allows."""
+        self._timer = None
+        self._refill()
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():  # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self.max_concurrency:
+                return  # release() dispatches again
+
+            # A single call larger than the whole budget only waits for a full bucket
+            tokens = min(tokens, self.tokens_per_minute)
+            missing_requests = 1 - self._requests
+            missing_tokens = tokens - self._tokens
+            if missing_requests > 0 or missing_tokens > 0:
+                delay = max(
+                    missing_requests * 60 / self.requests_per_minute,
+                    missing_tokens * 60 / self.tokens_per_minute,
+                )
+                self._timer = asyncio.get_running_loop().call_later(
+                    delay, self._dispatch
+                )
+                return
+
+            heapq.heappop(self._waiters)
+            self._requests -= 1
+            self._tokens -= tokens
+            self._in_flight += 1
+            future.set_result(None)
+
+    async def acquire(self, tokens: int, priority: int = PRIORITY_NORMAL) -> None:
+        """Wait for a slot and budget for one call of about `tokens` tokens."""
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), tokens, future)
+        heapq.heappush(self._waiters, entry)
+        self.stats["peak_queue"] = max(self.stats["peak_queue"], len(self._waiters))
+        if self._timer is not None and self._waiters[0] is entry:
+            # The pending refill was timed for the previous head of the queue
+            self._timer.cancel()
+            self._timer = None
+        if self._timer is None:
+            self._dispatch()
+
+        if not future.done():
+            self.stats["waited"] += 1
+            started = time.monotonic()
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release()  # admitted just as we were cancelled
+                raise
+            finally:
+                self.stats["wait_seconds"] += time.monotonic() - started
+        self.stats["granted"] += 1
+
+    def release(self) -> None:
+        """Return the concurrency slot of a finished call."""
+        self._in_flight -= 1
+        if self._timer is None:
+            self._dispatch()
+
+
+class LLMGovernor:
+    """Process-wide budgets for all LLM calls, one ProviderBudget per provider."""
+
+    def __init__(self, configurable: Configuration):
+        """Read the default and per-provider limits from the configuration."""
+        self.default_limits = (
+            configurable.llm_requests_per_minute,
+            configurable.llm_tokens_per_minute,
+            configurable.llm_max_concurrency,
+        )
+        self.provider_limits = configurable.get_llm_provider_limits()
+        self.providers: Dict[str, ProviderBudget] = {}
+
+    def budget(self, provider: str) -> ProviderBudget:
+        """Return the budget for `provider`, creating it on first use."""
+        if provider not in self.providers:
+            limits = self.provider_limits.get(provider, self.default_limits)
+            self.providers[provider] = ProviderBudget(*limits)
+        return self.providers[provider]
+
+
+# Futures and timers are bound to the loop they are used on, so governors are
+# kept per loop, one for each combination of budget settings in use.
+_governors: LoopLocalRegistry[LLMGovernor] = LoopLocalRegistry()
+
+
+def get_llm_governor(configurable: Configuration) -> LLMGovernor:
+    """Return the governor for the configured budgets on the running event loop."""
+    key = (
+        configurable.llm_requests_per_minute,
+        configurable.llm_tokens_per_minute,
+        configurable.llm_max_concurrency,
+        configurable.llm_provider_limits,
+    )
+    return _governors.get(key, lambda: LLMGovernor(configurable))
+
+
+class GovernedModel(Runnable):
+    """Admits each async call through the provider's budget before running it.
+
+    Sync invoke() calls bypass the governor; every graph node calls models
+    asynchronously.
+    """
+
+    def __init__(
+        self, bound: Runnable, model_name: str, max_tokens: int, priority: int
+    ):
+        """Govern calls to `bound`, charged to the provider of `model_name`."""
+        self.bound = bound
+        self.provider = provider_of(model_name)
+        self.max_tokens = max_tokens
+        self.priority = priority
+
+    def invoke(self, input: Any, config: RunnableConfig | None = None, **kwargs):
+        """Call the model directly (sync calls are not governed)."""
+        return self.bound.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: RunnableConfig | None = None, **kwargs):
+        """Wait for the provider's budget, then call the model."""
+        configurable = Configuration.from_runnable_config(ensure_config(config))
+        if not configurable.llm_governor_enabled:
+            return await self.bound.ainvoke(input, config, **kwargs)
+
+        budget = get_llm_governor(configurable).budget(self.provider)
+        await budget.acquire(estimate_tokens(input, self.max_tokens), self.priority)
+        try:
+            return await self.bound.ainvoke(input, config, **kwargs)
+        finally:
+            budget.release()
+
+
+# --- Retries and fallbacks ---
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+SERVER_ERROR = "server_error"
+PARSE_ERROR = "parse_error"
+FATAL = "fatal"
+
+# Error classes worth retrying on the same model with backoff. Fatal ones
+# (auth, bad request) never succeed and go straight to the next fallback
+# model; output that could not be repaired locally is re-asked once first.
+RETRYABLE = {RATE_LIMIT, TIMEOUT, SERVER_ERROR}
+PARSE_RETRIES = 1
+
+_RATE_LIMIT_NAMES = ("ratelimit", "resourceexhausted", "toomanyrequests")
+_TIMEOUT_NAMES = ("timeout", "deadlineexceeded")
+_SERVER_NAMES = (
+    "internalservererror",
+    "serviceunavailable",
+    "apiconnectionerror",
+    "connectionerror",
+    "servererror",
+    "modelconnectionerror",
+)
+_RETRY_DELAY = re.compile(
+    r"(?:retry[ _-]?(?:after|delay|in)\D{0,5})(\d+(?:\.\d+)?)\s*s", re.IGNORECASE
+)
+
+retry_stats: Dict[str, int] = {
+    "attempts": 0,
+    "retries": 0,
+    "fallbacks": 0,
+    "failures": 0,
+    RATE_LIMIT: 0,
+    TIMEOUT: 0,
+    SERVER_ERROR: 0,
+    PARSE_ERROR: 0,
+    FATAL: 0,
+}
+
+
+def _status_code(exc: BaseException) -> int | None:
+    for source in (exc, getattr(exc, "response", None)):
+        for attr in ("status_code", "status", "code"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def classify_error(exc: BaseException) -> str:
+    """Bucket a model call failure into rate limit, timeout, server, parse or fatal."""
+    if isinstance(exc, (ValidationError, OutputParserException, json.JSONDecodeError)):
+        return PARSE_ERROR
+
+    status = _status_code(exc)
+    names = [cls.__name__.lower() for cls in type(exc).__mro__]
+    message = str(exc).lower()
+
+    if (
+        status == 429
+        or any(n in name for name in names for n in _RATE_LIMIT_NAMES)
+        or "rate limit" in message
+        or "resource_exhausted" in message
+    ):
+        return RATE_LIMIT
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or any(
+        n in name for name in names for n in _TIMEOUT_NAMES
+    ):
+        return TIMEOUT
+    if (
+        (status is not None and status >= 500)
+        or isinstance(exc, ConnectionError)
+        or any(n in name for name in names for n in _SERVER_NAMES)
+    ):
+        return SERVER_ERROR
+    return FATAL
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """Delay the provider asked for, from a Retry-After header or the error text."""
+    value = getattr(exc, "retry_after", None)
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    header = headers.get("retry-after") if hasattr(headers, "get") else None
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    # e.g. Gemini: "Please retry in 21.5s" / "retryDelay": "21s"
+    match = _RETRY_DELAY.search(str(exc))
+    return float(match.group(1)) if match else None
+
+
+class RetryPolicy:
+    """Attempts per model and jittered exponential backoff between them."""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float):
+        """Make at least one attempt per model, backing off up to `max_delay`."""
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, exc: BaseException) -> float | None:
+        """Seconds to wait before retry number `attempt` (1-based).
+
+        Returns None when the provider's Retry-After exceeds `max_delay`:
+        retrying sooner would only be refused again, so move on instead.
+        """
+        requested = retry_after_seconds(exc)
+        if requested is not None:
+            if requested > self.max_delay:
+                return None
+            # Never earlier than the provider asked, plus a little jitter
+            return requested + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class ResilientModel(Runnable):
+    """Retries retryable errors per model, then fails over to the next model.
+
+    `chains` is the primary model chain followed by its fallbacks, each as
+    (model name, runnable).
+    """
+
+    def __init__(self, chains: List[Tuple[str, Runnable]], policy: RetryPolicy):
+        """Try `chains` in order, retrying each according to `policy`."""
+        self.chains = chains
+        self.policy = policy
+
+    def _on_error(self, model_name: str, attempt: int, exc: BaseException):
+        """Record the failure; return the delay before retrying, or None to move on."""
+        kind = classify_error(exc)
+        retry_stats[kind] += 1
+        if kind in RETRYABLE and attempt < self.policy.max_attempts:
+            delay = self.policy.delay(attempt, exc)
+            if delay is not None:
+                retry_stats["retries"] += 1
+                return delay
+        if kind == PARSE_ERROR and attempt <= PARSE_RETRIES:
+            # Local repair already failed; ask the same model once more
+            retry_stats["retries"] += 1
+            return 0.0
+        print(  # noqa: T201
+            f"LLM call to {model_name} failed ({kind}) after {attempt} attempt(s): {exc}"
+        )
+        return None
+
+    def _failover(self, index: int) -> None:
+        if index + 1 < len(self.chains):
+            retry_stats["fallbacks"] += 1
+            print(f"Falling back to {self.chains[index + 1][0]}")  # noqa: T201
+        else:
+            retry_stats["failures"] += 1
+
+    def invoke(self, input: Any, config: RunnableConfig | None = None, **kwargs):
+        """Call the chains in order until one succeeds."""
+        error: BaseException | None = None
+        for index, (model_name, chain) in enumerate(self.chains):
+            for attempt in range(1, self.policy.max_attempts + 1):
+                retry_stats["attempts"] += 1
+                try:
+                    return chain.invoke(input, config, **kwargs)
+                except Exception as exc:
+                    error = exc
+                    delay = self._on_error(model_name, attempt, exc)
+                    if delay is None:
+                        break
+                    time.sleep(delay)
+            self._failover(index)
+        raise error
+
+    async def ainvoke(self, input: Any, config: RunnableConfig | None = None, **kwargs):
+        """Call the chains in order until one succeeds, waiting between retries."""
+        error: BaseException | None = None
+        for index, (model_name, chain) in enumerate(self.chains):
+            for attempt in range(1, self.policy.max_attempts + 1):
+                retry_stats["attempts"] += 1
+                try:
+                    return await chain.ainvoke(input, config, **kwargs)
+                except Exception as exc:
+                    error = exc
+                    delay = self._on_error(model_name, attempt, exc)
+                    if delay is None:
+                        break
+                    await asyncio.sleep(delay)
+            self._failover(index)
+        raise error
+
+
 # This contains the shared logic. The underscore _ means other files shouldn't use it.
 def _build_and_configure_model(
     config: RunnableConfig,
@@ -19,76 +473,458 @@ def _build_and_configure_model(
     model_name: str,
     max_tokens: int,
     max_retries: int,
+    priority: int = PRIORITY_NORMAL,
 ) -> Runnable:
-    """Internal helper to apply retry and runtime configuration."""
-    model_config = {
-        "model": model_name,
-        "max_tokens": max_tokens,
-        "api_key": get_api_key_for_model(model_name, config),
-    }
-    return model_chain.with_retry(stop_after_attempt=max_retries).with_config(
-        model_config
+    """Internal helper to apply rate limiting, retry, fallbacks and runtime configuration."""
+    configurable = Configuration.from_runnable_config(config)
+    model_names = [model_name] + [
+        name for name in configurable.get_llm_fallback_models() if name != model_name
+    ]
+
+    chains = []
+    for name in model_names:
+        model_config = {
+            "model": name,
+            "max_tokens": max_tokens,
+            "api_key": get_api_key_for_model(name, config),
+        }
+        # Every attempt, retries included, goes through the provider budget
+        governed = GovernedModel(model_chain, name, max_tokens, priority)
+        chains.append((name, governed.with_config(model_config)))
+
+    policy = RetryPolicy(
+        max_attempts=max_retries,
+        base_delay=configurable.llm_retry_base_delay,
+        max_delay=configurable.llm_retry_max_delay,
+    )
+    return ResilientModel(chains, policy)
+
+
+# --- Response cache ---
+class LLMResponseCache(SQLiteCache):
+    """Store of model outputs, keyed by model, prompt and output schema.
+
+    Outputs (parsed pydantic objects for structured output, messages
+    otherwise) are stored as JSON and validated against the expected
+    schema on read; an entry that no longer validates is dropped.
+    """
+
+    table = "llm_cache"
+
+    def get(self, key: str, schema: Type[BaseModel]) -> BaseModel | None:
+        """Return the cached output for `key` as a `schema`, or None on a miss."""
+        value = self.get_value(key)
+        if value is None:
+            return None
+        try:
+            return schema.model_validate_json(value)
+        except ValidationError:
+            self.delete(key)
+            return None
+
+    def set(self, key: str, output: BaseModel) -> None:
+        """Store an output and evict old entries if over budget."""
+        self.set_value(key, output.model_dump_json())
+
+
+def _render_input(input: Any) -> str:
+    """Stable text form of a prompt: a string, a PromptValue or messages."""
+    if isinstance(input, PromptValue):
+        input = input.to_messages()
+    if isinstance(input, str):
+        return input
+    if isinstance(input, (list, tuple)):
+        rendered = []
+        for message in input:
+            if isinstance(message, BaseMessage):
+                # Message ids differ on every run, so only the content counts
+                rendered.append(
+                    {
+                        "type": message.type,
+                        "content": message.content,
+                        "tool_calls": getattr(message, "tool_calls", None),
+                        "tool_call_id": getattr(message, "tool_call_id", None),
+                    }
+                )
+            else:
+                rendered.append(message)
+        return json.dumps(rendered, sort_keys=True, default=str)
+    return json.dumps(input, sort_keys=True, default=str)
+
+
+def _schema_fingerprint(obj: Any) -> str:
+    """Identify a tool or output schema by its name and JSON schema."""
+    if isinstance(obj, type) and issubclass(obj, BaseModel):
+        schema = obj.model_json_schema()
+    elif isinstance(obj, BaseTool):
+        schema = {"description": obj.description, "args": obj.args}
+    else:
+        schema = repr(obj)
+    return f"{_tool_key(obj)}:{json.dumps(schema, sort_keys=True, default=str)}"
+
+
+class CachedModel(Runnable):
+    """Serves a model chain's outputs from the response cache when possible."""
+
+    def __init__(
+        self,
+        bound: Runnable,
+        cache: LLMResponseCache,
+        namespace: str,
+        output_type: Type[BaseModel] = AIMessage,
+    ):
+        """Cache `bound`'s `output_type` outputs in `cache`, keyed within `namespace`."""
+        self.bound = bound
+        self.cache = cache
+        self.namespace = namespace
+        self.output_type = output_type
+
+    def _key(self, input: Any) -> str:
+        return hashlib.sha256(
+            f"{self.namespace}\n{_render_input(input)}".encode()
+        ).hexdigest()
+
+    def invoke(self, input: Any, config: RunnableConfig | None = None, **kwargs):
+        """Return the cached output, or call the model and cache its output."""
+        key = self._key(input)
+        output = self.cache.get(key, self.output_type)
+        if output is None:
+            output = self.bound.invoke(input, config, **kwargs)
+            if isinstance(output, self.output_type):
+                self.cache.set(key, output)
+        return output
+
+    async def ainvoke(self, input: Any, config: RunnableConfig | None = None, **kwargs):
+        """Return the cached output, or call the model and cache its output."""
+        key = self._key(input)
+        # SQLite reads/writes, (de)serialization and eviction stay off the event loop
+        output = await asyncio.to_thread(self.cache.get, key, self.output_type)
+        if output is None:
+            output = await self.bound.ainvoke(input, config, **kwargs)
+            if isinstance(output, self.output_type):
+                await asyncio.to_thread(self.cache.set, key, output)
+        return output
+
+
+def get_llm_response_cache(configurable: Configuration) -> LLMResponseCache:
+    """Return the process-wide response cache for the configured path."""
+    return LLMResponseCache.shared(
+        configurable.llm_cache_path,
+        ttl_seconds=configurable.llm_cache_ttl_seconds,
+        max_bytes=configurable.llm_cache_max_mb * 1024 * 1024,
+    )
+
+
+def _with_response_cache(
+    chain: Runnable,
+    configurable: Configuration,
+    model_name: str,
+    max_tokens: int,
+    bound: List[Any],
+    output_type: Type[BaseModel] = AIMessage,
+) -> Runnable:
+    """Wrap a chain with the response cache when it is enabled."""
+    if not configurable.llm_cache_enabled:
+        return chain
+    namespace = json.dumps(
+        [model_name, max_tokens, [_schema_fingerprint(obj) for obj in bound]]
+    )
+    return CachedModel(
+        chain, get_llm_response_cache(configurable), namespace, output_type
     )
 
 
 # --- Public Function 1: For Models WITH Tools ---
 def create_llm_with_tools(
-    tools: List[Type[BaseTool]], config: RunnableConfig
+    tools: List[Type[BaseTool]],
+    config: RunnableConfig,
+    priority: int = PRIORITY_NORMAL,
 ) -> Runnable:
     """Creates a model configured specifically for tool-calling."""
     configurable = Configuration.from_runnable_config(config)
+    model_name = configurable.get_llm_with_tools_model()
+    key = (
+        "tools",
+        model_name,
+        configurable.tools_llm_max_tokens,
+        configurable.max_tools_output_retries,
+        get_api_key_for_model(model_name, config),
+        tuple(_schema_fingerprint(tool) for tool in tools),
+        configurable.llm_cache_enabled,
+        configurable.llm_cache_path,
+        priority,
+        configurable.llm_fallback_models,
+        configurable.llm_retry_base_delay,
+        configurable.llm_retry_max_delay,
+    )
 
-    # Start the chain by binding the tools
-    model_with_tools = configurable_model.bind_tools(tools)
-
-    return _build_and_configure_model(
-        config=config,
-        model_chain=model_with_tools,
-        model_name=configurable.get_llm_with_tools_model(),
-        max_tokens=configurable.tools_llm_max_tokens,
-        max_retries=configurable.max_tools_output_retries,
+    return _cached_runnable(
+        key,
+        lambda: _with_response_cache(
+            _build_and_configure_model(
+                config=config,
+                # Start the chain by binding the tools
+                model_chain=configurable_model.bind_tools(tools),
+                model_name=model_name,
+                max_tokens=configurable.tools_llm_max_tokens,
+                max_retries=configurable.max_tools_output_retries,
+                priority=priority,
+            ),
+            configurable,
+            model_name,
+            configurable.tools_llm_max_tokens,
+            list(tools),
+        ),
     )
 
 
+def _raw_payload(message: AIMessage) -> Any:
+    """Return the structured answer as the model sent it: tool call args or text."""
+    for call in getattr(message, "tool_calls", None) or []:
+        return call["args"]
+    for call in getattr(message, "invalid_tool_calls", None) or []:
+        if call.get("args"):
+            return call["args"]
+    content = message.content
+    if isinstance(content, list):
+        content = "".join(
+            part if isinstance(part, str) else part.get("text", "") for part in content
+        )
+    return content
+
+
+def _parse_structured(class_name: Type[BaseModel]) -> Callable[[dict], BaseModel]:
+    """Repair and salvage a structured answer the strict parser rejected.
+
+    Only when nothing valid can be recovered locally is an
+    OutputParserException raised, so the model is asked again.
+    """
+
+    def parse(output: dict) -> BaseModel:
+        if output.get("parsing_error") is None and output.get("parsed") is not None:
+            repair_stats["parsed"] += 1
+            return output["parsed"]
+
+        payload = _raw_payload(output["raw"])
+        try:
+            data = repair_json(payload) if isinstance(payload, str) else payload
+            result = validate_with_salvage(class_name, data)
+        except (ValueError, TypeError, ValidationError) as e:
+            repair_stats["failed"] += 1
+            raise OutputParserException(
+                f"Could not repair {class_name.__name__} output: {e}"
+            ) from e
+        repair_stats["repaired"] += 1
+        return result
+
+    return parse
+
+
+def _base_model(class_name: Type[BaseModel] | None) -> Runnable:
+    if class_name:
+        # Keep the raw message so a malformed answer can be repaired locally
+        # instead of paying for another round trip
+        return configurable_model.with_structured_output(
+            class_name, include_raw=True
+        ) | RunnableLambda(_parse_structured(class_name))
+    # The chain is just the base model itself
+    return configurable_model
+
+
 # --- Public Function 2: For Models WITHOUT Tools ---
 def create_llm_structured_model(
-    config: RunnableConfig, class_name: Type[BaseModel] | None = None
+    config: RunnableConfig,
+    class_name: Type[BaseModel] | None = None,
+    priority: int = PRIORITY_NORMAL,
+    model_name: str | None = None,
 ) -> Runnable:
     """Creates a general-purpose chat model with no tools."""
     configurable = Configuration.from_runnable_config(config)
+    model_name = model_name or configurable.get_llm_structured_model()
+    key = (
+        "structured",
+        model_name,
+        configurable.structured_llm_max_tokens,
+        configurable.max_structured_output_retries,
+        get_api_key_for_model(model_name, config),
+        class_name,
+        configurable.llm_cache_enabled,
+        configurable.llm_cache_path,
+        priority,
+        configurable.llm_fallback_models,
+        configurable.llm_retry_base_delay,
+        configurable.llm_retry_max_delay,
+    )
 
-    # The chain is just the base model itself
-    if class_name:
-        base_model = configurable_model.with_structured_output(class_name)
-    else:
-        base_model = configurable_model
-
-    return _build_and_configure_model(
-        config=config,
-        model_chain=base_model,
-        model_name=configurable.get_llm_structured_model(),
-        max_tokens=configurable.structured_llm_max_tokens,
-        max_retries=configurable.max_structured_output_retries,
+    return _cached_runnable(
+        key,
+        lambda: _with_response_cache(
+            _build_and_configure_model(
+                config=config,
+                model_chain=_base_model(class_name),
+                model_name=model_name,
+                max_tokens=configurable.structured_llm_max_tokens,
+                max_retries=configurable.max_structured_output_retries,
+                priority=priority,
+            ),
+            configurable,
+            model_name,
+            configurable.structured_llm_max_tokens,
+            [class_name] if class_name else [],
+            class_name or AIMessage,
+        ),
     )
 
 
 # --- Public Function 3: For Small Chunk Models ---
 def create_llm_chunk_model(
-    config: RunnableConfig, class_name: Type[BaseModel] | None = None
+    config: RunnableConfig,
+    class_name: Type[BaseModel] | None = None,
+    priority: int = PRIORITY_BULK,
+    model_name: str | None = None,
 ) -> Runnable:
     """Creates a small model for chunk drama event detection."""
     configurable = Configuration.from_runnable_config(config)
+    model_name = model_name or configurable.get_llm_chunk_model()
+    key = (
+        "chunk",
+        model_name,
+        CHUNK_MAX_TOKENS,
+        CHUNK_MAX_RETRIES,
+        get_api_key_for_model(model_name, config),
+        class_name,
+        configurable.llm_cache_enabled,
+        configurable.llm_cache_path,
+        priority,
+        configurable.llm_fallback_models,
+        configurable.llm_retry_base_delay,
+        configurable.llm_retry_max_delay,
+    )
 
-    # The chain is just the base model itself
-    if class_name:
-        base_model = configurable_model.with_structured_output(class_name)
-    else:
-        base_model = configurable_model
-
-    return _build_and_configure_model(
-        config=config,
-        model_chain=base_model,
-        model_name=configurable.get_llm_chunk_model(),
-        max_tokens=1024,  # Smaller token limit for chunk processing
-        max_retries=2,  # Fewer retries for chunk processing
+    return _cached_runnable(
+        key,
+        lambda: _with_response_cache(
+            _build_and_configure_model(
+                config=config,
+                model_chain=_base_model(class_name),
+                model_name=model_name,
+                max_tokens=CHUNK_MAX_TOKENS,
+                max_retries=CHUNK_MAX_RETRIES,
+                priority=priority,
+            ),
+            configurable,
+            model_name,
+            CHUNK_MAX_TOKENS,
+            [class_name] if class_name else [],
+            class_name or AIMessage,
+        ),
     )
+
+
+# --- Model cascades ---
+cascade_stats: Dict[str, Dict[str, int]] = {}
+
+
+def default_output_check(output: Any) -> bool:
+    """Whether a cheap model's answer is good enough to keep: it parsed at all.
+
+    Failed calls and output that could not be repaired already escalate;
+    tasks pass their own check for answers that parse but are unusable.
+    """
+    return output is not None
+
+
+class CascadeModel(Runnable):
+    """Tries models from cheapest to strongest and keeps the first good answer.
+
+    An answer is escalated to the next model when the call fails (after that
+    model's own retries and repairs) or when `check(output)` is False. The
+    last model's answer is returned as is.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        stages: List[Tuple[str, Runnable]],
+        check: Callable[[Any], bool],
+    ):
+        """Run `stages` (model name, chain) in order for `task`."""
+        self.task = task
+        self.stages = stages
+        self.check = check
+        self.stats = cascade_stats.setdefault(task, {"calls": 0, "escalated": 0})
+
+    def _accept(self, model_name: str, output: Any) -> bool:
+        if self.check(output):
+            return True
+        print(f"Escalating {self.task}: {model_name} answer failed the check")  # noqa: T201
+        return False
+
+    def _failed(self, model_name: str, exc: Exception) -> None:
+        print(f"Escalating {self.task}: {model_name} failed ({exc})")  # noqa: T201
+
+    def invoke(self, input: Any, config: RunnableConfig | None = None, **kwargs):
+        """Return the first stage's answer that passes the check."""
+        self.stats["calls"] += 1
+        for index, (model_name, model) in enumerate(self.stages[:-1]):
+            if index:
+                self.stats["escalated"] += 1
+            try:
+                output = model.invoke(input, config, **kwargs)
+            except Exception as e:
+                self._failed(model_name, e)
+                continue
+            if self._accept(model_name, output):
+                return output
+        if len(self.stages) > 1:
+            self.stats["escalated"] += 1
+        return self.stages[-1][1].invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: RunnableConfig | None = None, **kwargs):
+        """Return the first stage's answer that passes the check."""
+        self.stats["calls"] += 1
+        for index, (model_name, model) in enumerate(self.stages[:-1]):
+            if index:
+                self.stats["escalated"] += 1
+            try:
+                output = await model.ainvoke(input, config, **kwargs)
+            except Exception as e:
+                self._failed(model_name, e)
+                continue
+            if self._accept(model_name, output):
+                return output
+        if len(self.stages) > 1:
+            self.stats["escalated"] += 1
+        return await self.stages[-1][1].ainvoke(input, config, **kwargs)
+
+
+# --- Public Function 4: For Tasks Routed Through a Cascade ---
+def create_llm_cascade_model(
+    task: str,
+    config: RunnableConfig,
+    class_name: Type[BaseModel],
+    create: Callable[..., Runnable] = create_llm_structured_model,
+    check: Callable[[Any], bool] | None = None,
+    priority: int = PRIORITY_NORMAL,
+) -> Runnable:
+    """Create the model for `task`, cascading cheap to strong when configured.
+
+    `create` builds each stage (create_llm_structured_model or
+    create_llm_chunk_model). Without a cascade for the task in
+    `llm_cascades`, this is just the model `create` would return.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    model_names = configurable.get_llm_cascade(task)
+    if len(model_names) < 2:
+        return create(
+            config,
+            class_name,
+            priority=priority,
+            model_name=model_names[0] if model_names else None,
+        )
+
+    stages = [
+        (name, create(config, class_name, priority=priority, model_name=name))
+        for name in model_names
+    ]
+    return CascadeModel(task, stages, check or default_output_check)
@@ -0,0 +1,46 @@
+# src/loop_local.py
+"""Registry of objects bound to the running event loop."""
+
+import asyncio
+from typing import Callable, Dict, Generic, Hashable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class LoopLocalRegistry(Generic[T]):
+    """One object per settings key, rebuilt whenever the event loop changes.
+
+    Semaphores, futures, timers and sessions only work on the loop they were
+    created on (LangGraph dev server reloads and each pytest-asyncio test run
+    on a new one). When the running loop changes, every object built on the
+    previous loop is passed to `on_discard` with that loop and forgotten.
+    """
+
+    def __init__(
+        self,
+        on_discard: Callable[[T, asyncio.AbstractEventLoop], None] | None = None,
+    ):
+        """Create an empty registry; `on_discard` releases objects of an old loop."""
+        self.on_discard = on_discard
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._objects: Dict[Hashable, T] = {}
+
+    def get(self, key: Hashable, build: Callable[[], T]) -> T:
+        """Return the object for `key` on the running loop, building it on first use."""
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            stale = self.clear()
+            if self.on_discard is not None and self.loop is not None:
+                for obj in stale:
+                    self.on_discard(obj, self.loop)
+            self.loop = loop
+
+        if key not in self._objects:
+            self._objects[key] = build()
+        return self._objects[key]
+
+    def clear(self) -> List[T]:
+        """Forget every object, returning them so the caller can release them."""
+        objects = list(self._objects.values())
+        self._objects.clear()
+        return objects
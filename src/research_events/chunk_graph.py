@@ -4,7 +4,12 @@ from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from pydantic import BaseModel, Field
 from src.configuration import Configuration
-from src.llm_service import create_llm_chunk_model
+from src.llm_service import (
+    PRIORITY_BULK,
+    create_llm_cascade_model,
+    create_llm_chunk_model,
+)
+from src.research_events.chunk_prefilter import get_chunk_prefilter
 
 
 # CHANGED: Renamed from BiographicEventCheck to match our new domain
@@ -24,29 +29,27 @@ class ChunkResult(BaseModel):
 
 class ChunkState(TypedDict):
     text: str
+    # Optional: the claim being researched, used by the local pre-filter
+    research_question: str
     chunks: List[str]
     results: Dict[str, ChunkResult]
 
 
+CHUNK_SIZE = 2000
+
+
+def split_pieces(text: str) -> List[str]:
+    """Cut text into the pieces the classifier judges."""
+    return [text[i : i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+
+
 def split_text(state: ChunkState) -> ChunkState:
     """Split text into smaller chunks."""
-    text = state["text"]
-    chunk_size = 2000
-    chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
-    return {"chunks": chunks}
+    return {"chunks": split_pieces(state["text"])}
 
 
-def check_chunk_for_events(state: ChunkState, config) -> ChunkState:
-    """Check each chunk for drama/scandal events using structured output."""
-    # CHANGED: Using the new Pydantic model
-    model = create_llm_chunk_model(config, DramaEventCheck)
-    results = {}
-
-    for i, chunk in enumerate(state["chunks"]):
-        # CHANGED: Completely rewrote the prompt to detect "Tea" instead of "History"
-        prompt = f"""
-        Analyze this text chunk and determine if it contains SPECIFIC details regarding a scandal, controversy, or internet drama.
-        
+# CHANGED: Completely rewrote the prompt to detect "Tea" instead of "History"
+CHUNK_CRITERIA = """
         ONLY mark as true if the chunk contains:
         - Specific accusations, allegations, or "call outs"
         - Details of a conflict (arguments, fights, breakups, beefs)
@@ -63,15 +66,157 @@ def check_chunk_for_events(state: ChunkState, config) -> ChunkState:
         - General descriptions of their career that are not part of the drama
         
         The info must be specific "tea" or context for the drama, not just filler text.
-        
+"""
+
+CHUNK_CHECK_PROMPT = """
+        Analyze this text chunk and determine if it contains SPECIFIC details regarding a scandal, controversy, or internet drama.
+        {criteria}
         Text chunk: "{chunk}"
         """
 
-        result = model.invoke(prompt)
-        results[f"chunk_{i}"] = ChunkResult(
-            content=chunk, contains_drama_event=result.contains_drama_event
+CHUNK_BATCH_CHECK_PROMPT = """
+        Analyze each of the {count} numbered text chunks below and determine, for each one, if it contains SPECIFIC details regarding a scandal, controversy, or internet drama.
+        {criteria}
+        Return exactly {count} booleans, one per chunk, in order.
+
+        {chunks}
+        """
+
+
+class DramaEventBatchCheck(BaseModel):
+    """Relevance flags for several numbered chunks classified in one call."""
+
+    contains_drama_event: List[bool] = Field(
+        description="One flag per numbered chunk, in order: whether it contains relevant drama, scandal, or conflict information"
+    )
+
+
+def _has_flags(output: DramaEventBatchCheck) -> bool:
+    """Cascade check for grouped classification: the answer holds some flags.
+
+    A single-chunk answer is a plain bool, so it only escalates when it could
+    not be parsed; a group answered with the wrong number of flags is re-asked
+    per chunk instead.
+    """
+    return output is not None and bool(output.contains_drama_event)
+
+
+async def _classify_one_by_one(chunks: List[str], config) -> List[bool]:
+    """One classifier call per chunk, run concurrently."""
+    configurable = Configuration.from_runnable_config(config)
+    model = create_llm_cascade_model(
+        "classification",
+        config,
+        DramaEventCheck,
+        create=create_llm_chunk_model,
+        priority=PRIORITY_BULK,
+    )
+    prompts = [
+        CHUNK_CHECK_PROMPT.format(criteria=CHUNK_CRITERIA, chunk=chunk)
+        for chunk in chunks
+    ]
+    outputs = await model.abatch(
+        prompts,
+        config={"max_concurrency": configurable.chunk_classifier_concurrency},
+        return_exceptions=True,
+    )
+    verdicts = []
+    for output in outputs:
+        if isinstance(output, Exception):
+            print(f"Error classifying chunk: {output}")  # noqa: T201
+            verdicts.append(False)
+        else:
+            verdicts.append(output.contains_drama_event)
+    return verdicts
+
+
+async def _classify_in_groups(chunks: List[str], config, group_size: int) -> List[bool]:
+    """Several chunks per classifier call, answered as a list of booleans."""
+    configurable = Configuration.from_runnable_config(config)
+    model = create_llm_cascade_model(
+        "classification",
+        config,
+        DramaEventBatchCheck,
+        create=create_llm_chunk_model,
+        check=_has_flags,
+        priority=PRIORITY_BULK,
+    )
+    groups = [chunks[i : i + group_size] for i in range(0, len(chunks), group_size)]
+    prompts = [
+        CHUNK_BATCH_CHECK_PROMPT.format(
+            criteria=CHUNK_CRITERIA,
+            count=len(group),
+            chunks="\n\n".join(
+                f'Chunk {n}: "{chunk}"' for n, chunk in enumerate(group, 1)
+            ),
         )
+        for group in groups
+    ]
+    outputs = await model.abatch(
+        prompts,
+        config={"max_concurrency": configurable.chunk_classifier_concurrency},
+        return_exceptions=True,
+    )
 
+    verdicts = []
+    for group, output in zip(groups, outputs):
+        if isinstance(output, Exception) or len(output.contains_drama_event) != len(
+            group
+        ):
+            # Malformed answer for this group: ask about its chunks one by one
+            verdicts.extend(await _classify_one_by_one(group, config))
+        else:
+            verdicts.extend(output.contains_drama_event)
+    return verdicts
+
+
+async def classify_chunks(chunks: List[str], claim: str, config) -> List[bool]:
+    """Classify chunks in one pass: pre-filter, then grouped or single LLM calls.
+
+    All LLM calls of the pass share one `chunk_classifier_concurrency` limit,
+    and with `chunk_classifier_batch_size` > 1 chunks are grouped across the
+    whole list, so callers with many texts should pass all their pieces here
+    at once rather than classifying text by text.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    prefilter = (
+        get_chunk_prefilter(configurable)
+        if configurable.chunk_prefilter_enabled
+        else None
+    )
+    verdicts: List[bool | None] = [None] * len(chunks)
+
+    # Obvious chunks are decided locally; only the uncertain ones cost a call
+    if prefilter:
+        verdicts = [prefilter.classify(chunk, claim) for chunk in chunks]
+    uncertain = [i for i, verdict in enumerate(verdicts) if verdict is None]
+
+    if uncertain:
+        texts = [chunks[i] for i in uncertain]
+        group_size = configurable.chunk_classifier_batch_size
+        if group_size > 1 and len(texts) > 1:
+            answers = await _classify_in_groups(texts, config, group_size)
+        else:
+            answers = await _classify_one_by_one(texts, config)
+        for i, answer in zip(uncertain, answers):
+            verdicts[i] = answer
+
+    if prefilter:
+        print(  # noqa: T201
+            f"Pre-filter: {len(chunks) - len(uncertain)} of {len(chunks)} chunks "
+            f"decided locally (totals: {prefilter.stats})"
+        )
+    return verdicts
+
+
+async def check_chunk_for_events(state: ChunkState, config) -> ChunkState:
+    """Check each chunk for drama/scandal events using structured output."""
+    chunks = state["chunks"]
+    verdicts = await classify_chunks(chunks, state.get("research_question", ""), config)
+    results = {
+        f"chunk_{i}": ChunkResult(content=chunk, contains_drama_event=verdict)
+        for i, (chunk, verdict) in enumerate(zip(chunks, verdicts))
+    }
     return {"results": results}
 
 
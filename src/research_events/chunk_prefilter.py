@@ -0,0 +1,111 @@
+# src/research_events/chunk_prefilter.py
+"""Local scoring that settles obvious chunks before the LLM classifier."""
+
+import re
+from typing import Dict, Tuple
+
+from src.configuration import Configuration
+from src.services.relevance_service import RelevanceService
+
+# Words that signal a concrete event, claim or finding worth extracting
+_SIGNAL = re.compile(
+    r"\b(?:accus\w*|alleg\w*|lawsuit\w*|sued|su(?:es|ing)|court|police|arrest\w*|"
+    r"apolog\w*|statement\w*|announc\w*|confirm\w*|den(?:y|ied|ies)|leak\w*|"
+    r"scandal\w*|controvers\w*|feud\w*|backlash|cancel\w*|banned|fired|resign\w*|"
+    r"stud(?:y|ies)|trial\w*|meta-analys[ie]s|research\w*|evidence|found|findings|"
+    r"survey\w*|data|report\w*|debunk\w*|myth\w*|fact[- ]check\w*|misleading|"
+    r"according)\b",
+    re.IGNORECASE,
+)
+# Figures, percentages and dates: the "statistics" a claim is checked against
+_NUMERIC = re.compile(
+    r"\b\d[\d,.]*\s*(?:%|percent|per cent|mg|kg|g|ml)?|\b(?:19|20)\d{2}\b",
+    re.IGNORECASE,
+)
+_BOILERPLATE = re.compile(
+    r"\b(?:cookies?|subscribe\w*|newsletter|sign (?:in|up)|log ?in|privacy policy|"
+    r"terms of (?:use|service)|all rights reserved|advertis\w*|sponsored|"
+    r"share this|follow us|related (?:posts|articles)|read more)\b",
+    re.IGNORECASE,
+)
+
+# Chunks with fewer content words than this carry nothing to classify
+MIN_WORDS = 8
+# Share of the claim's terms a chunk must contain to be accepted locally;
+# generic signal words and figures alone never accept a chunk
+MIN_ACCEPT_OVERLAP = 0.5
+
+
+def claim_overlap(text: str, claim: str) -> float:
+    """Return the share of the claim's terms that appear in `text` (0 if no claim)."""
+    claim_terms = set(RelevanceService.tokenize(claim))
+    if not claim_terms:
+        return 0.0
+    return len(claim_terms & set(RelevanceService.tokenize(text))) / len(claim_terms)
+
+
+def score_chunk(text: str, claim: str = "") -> float:
+    """Cheap 0-1 relevance estimate from keywords, claim overlap and figures."""
+    terms = RelevanceService.tokenize(text)
+    if len(terms) < MIN_WORDS:
+        return 0.0
+
+    per_100 = 100 / len(terms)
+    signal = min(1.0, len(_SIGNAL.findall(text)) * per_100 / 3)
+    numeric = min(1.0, len(_NUMERIC.findall(text)) * per_100 / 5)
+    boilerplate = min(1.0, len(_BOILERPLATE.findall(text)) * per_100 / 3)
+
+    if RelevanceService.tokenize(claim):
+        score = 0.4 * claim_overlap(text, claim) + 0.35 * signal + 0.25 * numeric
+    else:
+        score = 0.6 * signal + 0.4 * numeric
+    score -= 0.5 * boilerplate
+    return round(min(max(score, 0.0), 1.0), 4)
+
+
+class ChunkPrefilter:
+    """Decides obvious chunks locally so only uncertain ones reach the LLM.
+
+    Chunks scoring at or below `reject_below` are irrelevant, and anything
+    else is left to the classifier model unless it scores at or above
+    `accept_above` and shares at least MIN_ACCEPT_OVERLAP of the claim's
+    terms. Without a claim nothing is accepted locally.
+    """
+
+    def __init__(self, reject_below: float, accept_above: float):
+        """Reject scores at or below `reject_below`, accept at or above `accept_above`."""
+        self.reject_below = reject_below
+        self.accept_above = accept_above
+        self.stats: Dict[str, int] = {"accepted": 0, "rejected": 0, "uncertain": 0}
+
+    def classify(self, text: str, claim: str = "") -> bool | None:
+        """Return True or False when confident, None when the LLM should decide."""
+        score = score_chunk(text, claim)
+        if (
+            score >= self.accept_above
+            and claim_overlap(text, claim) >= MIN_ACCEPT_OVERLAP
+        ):
+            self.stats["accepted"] += 1
+            return True
+        if score <= self.reject_below:
+            self.stats["rejected"] += 1
+            return False
+        self.stats["uncertain"] += 1
+        return None
+
+
+_prefilters: Dict[Tuple[float, float], ChunkPrefilter] = {}
+
+
+def get_chunk_prefilter(configurable: Configuration) -> ChunkPrefilter:
+    """Return the process-wide pre-filter for the configured thresholds.
+
+    One instance per threshold pair, so its counters add up across calls.
+    """
+    key = (
+        configurable.chunk_prefilter_reject_below,
+        configurable.chunk_prefilter_accept_above,
+    )
+    if key not in _prefilters:
+        _prefilters[key] = ChunkPrefilter(*key)
+    return _prefilters[key]
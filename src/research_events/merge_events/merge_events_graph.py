@@ -1,4 +1,3 @@
-import json
 from typing import List, Literal, TypedDict
 
 from langchain_core.tools import tool
@@ -9,9 +8,10 @@ from langgraph.graph.state import Command, RunnableConfig
 import asyncio
 from pydantic import BaseModel, Field
 from src.configuration import Configuration
-from src.llm_service import create_llm_with_tools
+from src.core.json_repair import parse_tool_args
+from src.llm_service import PRIORITY_BULK, create_llm_with_tools
 
-from src.research_events.chunk_graph import create_drama_event_graph
+from src.research_events.chunk_graph import classify_chunks, split_pieces
 from src.research_events.merge_events.prompts import (
     EXTRACT_AND_CATEGORIZE_PROMPT,
     MERGE_EVENTS_TEMPLATE,
@@ -53,7 +53,7 @@ class OutputMergeEventsState(TypedDict):
 
 
 async def split_events(
-    state: MergeEventsState,
+    state: MergeEventsState, config: RunnableConfig
 ) -> Command[Literal["filter_chunks", "__end__"]]:
     """Use token-based chunking."""
     extracted_events = state.get("extracted_events", "")
@@ -62,10 +62,10 @@ async def split_events(
             goto="__end__", update={"text_chunks": [], "categorized_chunks": []}
         )
 
-    chunks = await chunk_text_by_tokens(extracted_events)
+    chunks = await chunk_text_by_tokens(extracted_events, max_chunks=20, config=config)
     return Command(
         goto="filter_chunks",
-        update={"text_chunks": chunks[0:20], "categorized_chunks": []},
+        update={"text_chunks": chunks, "categorized_chunks": []},
     )
 
 
@@ -77,8 +77,8 @@ async def filter_chunks(
     if not chunks:
         return Command(goto="__end__")
 
-    chunk_graph = create_drama_event_graph()
     configurable = Configuration.from_runnable_config(config)
+    research_question = state.get("research_question", "")
 
     # Slice chunks to max limit
     processing_chunks = (
@@ -87,19 +87,25 @@ async def filter_chunks(
         else chunks
     )
 
-    relevant_chunks = []
-    # Process sequentially to avoid event loop overload
-    for chunk in processing_chunks:
-        try:
-            chunk_result = await chunk_graph.ainvoke({"text": chunk}, config)
-            has_events = any(
-                result.contains_drama_event
-                for result in chunk_result["results"].values()
-            )
-            if has_events:
-                relevant_chunks.append(chunk)
-        except Exception as e:
-            print(f"Error filtering chunk: {e}")
+    # Classify the pieces of every chunk in one pass, so pieces are grouped
+    # across chunks and all calls share one concurrency limit
+    pieces = [
+        (index, piece)
+        for index, chunk in enumerate(processing_chunks)
+        for piece in split_pieces(chunk)
+    ]
+    try:
+        verdicts = await classify_chunks(
+            [piece for _, piece in pieces], research_question, config
+        )
+    except Exception as e:
+        print(f"Error filtering chunks: {e}")
+        verdicts = [False] * len(pieces)
+
+    relevant = {index for (index, _), verdict in zip(pieces, verdicts) if verdict}
+    relevant_chunks = [
+        chunk for index, chunk in enumerate(processing_chunks) if index in relevant
+    ]
 
     if not relevant_chunks:
         return Command(goto="__end__")
@@ -124,7 +130,7 @@ async def extract_and_categorize_chunk(
     prompt = EXTRACT_AND_CATEGORIZE_PROMPT.format(text_chunk=chunk)
 
     tools = [tool(RelevantEventsCategorized), tool(IrrelevantChunk)]
-    model = create_llm_with_tools(tools=tools, config=config)
+    model = create_llm_with_tools(tools=tools, config=config, priority=PRIORITY_BULK)
 
     try:
         response = await model.ainvoke(prompt)
@@ -132,14 +138,8 @@ async def extract_and_categorize_chunk(
         # DEFENSIVE CODING: Check if tool calls exist
         if response.tool_calls:
             tool_call = response.tool_calls[0]
-            args = tool_call["args"]
-
-            # GEMINI FIX: Parse JSON string if needed
-            if isinstance(args, str):
-                try:
-                    args = json.loads(args)
-                except:
-                    args = {}
+            # GEMINI FIX: args may arrive as a (possibly truncated) JSON string
+            args = parse_tool_args(tool_call["args"])
 
             if tool_call["name"] == "RelevantEventsCategorized":
                 # Convert list values to strings if necessary
@@ -1,43 +1,118 @@
 # src/research_events/research_events_graph.py
 import asyncio
-from typing import Literal
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Literal, Tuple
 
-from langchain_tavily import TavilySearch
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import Command
-from langchain_core.runnables import RunnableConfig
-
 from src.configuration import Configuration
+from src.research_events.search_backends import get_search_backend
 from src.services.event_service import EventService
+from src.services.relevance_service import RelevanceService
+from src.services.source_service import SourceService
+from src.services.url_service import URLService
 from src.state import ResearchState
-from src.url_crawler.utils import url_crawl, chunk_text_by_tokens
+from src.url_crawler.chunking import chunk_documents
+from src.url_crawler.cpu_executor import get_cpu_executor, run_cpu_bound
+from src.url_crawler.fingerprint import DuplicateDetector, simhash
+from src.url_crawler.utils import chunk_texts_by_tokens, normalize_content, url_crawl
 from src.utils import get_langfuse_handler
-from src.services.url_service import URLService
 
 
-import asyncio
-from typing import Literal
+class SearchResultCache:
+    """In-memory TTL cache of search results, keyed by normalized query and params.
 
-from langchain_tavily import TavilySearch
-from langgraph.graph import END, START, StateGraph
-from langgraph.types import Command
-from langchain_core.runnables import RunnableConfig
+    Holds at most `max_entries` results, evicting the least recently used,
+    and keeps only the first `max_content_length` characters of page text.
+    """
 
-from src.configuration import Configuration
-from src.services.event_service import EventService
-from src.state import ResearchState
-from src.url_crawler.utils import url_crawl, chunk_text_by_tokens
-from src.utils import get_langfuse_handler
+    def __init__(self, ttl_seconds: int, max_entries: int, max_content_length: int):
+        """Create an empty cache with the given expiry and size limits."""
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_content_length = max_content_length
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+        self._entries: OrderedDict[tuple, Tuple[float, list]] = OrderedDict()
+
+    @staticmethod
+    def make_key(query: str, **params) -> tuple:
+        """Key that ignores case, punctuation and spacing differences in the query."""
+        normalized = _NON_WORD.sub(" ", query.lower()).strip()
+        return (normalized, tuple(sorted(params.items())))
+
+    def get(self, key: tuple) -> list | None:
+        """Return cached results for `key`, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        stored_at, results = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return results
+
+    def set(self, key: tuple, results: list) -> None:
+        """Store results, evicting the least recently used entry if full."""
+        results = [
+            {**result, "raw_content": result["raw_content"][: self.max_content_length]}
+            if result.get("raw_content")
+            else result
+            for result in results
+        ]
+        self._entries[key] = (time.monotonic(), results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+
+_NON_WORD = re.compile(r"\W+")
+# One cache per (ttl, size, content length) setting, so a run's own limits always apply
+_search_caches: Dict[Tuple[int, int, int], SearchResultCache] = {}
+
+
+def get_search_cache(configurable: Configuration) -> SearchResultCache:
+    """Return the process-wide search result cache for the configured limits."""
+    key = (
+        configurable.search_cache_ttl_seconds,
+        configurable.search_cache_max_entries,
+        configurable.max_content_length,
+    )
+    if key not in _search_caches:
+        _search_caches[key] = SearchResultCache(*key)
+    return _search_caches[key]
 
 
 # 1. 搜尋節點：三角驗證法
-def search_node(state: ResearchState) -> Command[Literal["process_batch"]]:
+async def search_node(
+    state: ResearchState, config: RunnableConfig
+) -> Command[Literal["process_batch"]]:
     """
     Finds evidence to confirm or bust a myth.
     Strategy: Triangulate the truth using Scientific, Statistical, and Debunking queries.
+
+    The queries run concurrently. As each query returns, the current
+    `max_sources_per_call` best sources start loading (search content when
+    usable, a scrape otherwise) while the other queries run; a source pushed
+    out of the top by a later result is cancelled.
     """
     claim = state.get("research_question")
-    existing_urls = state.get("processed_urls", [])
+    existing_urls = state.get("processed_urls") or set()
 
     # === MythBuster Search Strategy ===
 
@@ -53,28 +128,115 @@ def search_node(state: ResearchState) -> Command[Literal["process_batch"]]:
 
     queries = [query_science, query_debunk, query_context]
 
-    print(f"MythBuster investigating claim: {claim}")
-
-    tavily = TavilySearch(
-        max_results=3, include_answer=False, include_raw_content=False
-    )
-
-    all_found_urls = []
-
-    for q in queries:
+    print(f"MythBuster investigating claim: {claim}")  # noqa: T201
+
+    configurable = Configuration.from_runnable_config(config)
+    backend = get_search_backend(configurable)
+    search_params = {
+        "max_results": 3,
+        # Ask for page text up front so most results need no separate scrape
+        "include_raw_content": configurable.use_search_raw_content,
+    }
+    cache = None if configurable.bypass_search_cache else get_search_cache(configurable)
+
+    async def run_query(q):
+        key = SearchResultCache.make_key(q, backend=backend.name, **search_params)
+        results = cache.get(key) if cache is not None else None
+        if results is None:
+            try:
+                results = await backend.search(q, **search_params)
+            except Exception as e:
+                print(f"Search error for query '{q}': {e}")  # noqa: T201
+                return []
+            if cache is not None:
+                cache.set(key, results)
+        return results
+
+    async def raw_page(result) -> str:
+        """Return the cleaned raw content of a search result, or "" if too short to trust."""
+        raw = result.get("raw_content") or ""
+        if len(raw) < configurable.min_raw_content_length:
+            return ""
         try:
-            results = tavily.invoke({"query": q})
-            urls = [r["url"] for r in results.get("results", [])]
-            all_found_urls.extend(urls)
+            normalized = await run_cpu_bound(configurable, normalize_content, raw)
         except Exception as e:
-            print(f"Search error for query '{q}': {e}")
-
-    unique_found_urls = list(set(all_found_urls))
-    new_urls = [url for url in unique_found_urls if url not in existing_urls]
-
-    print(f"Found {len(new_urls)} new sources for verification.")
+            print(f"Error cleaning search content for {result.get('url')}: {e}")  # noqa: T201
+            return ""
+        return normalized.text[: configurable.max_content_length]
+
+    scraped_urls = set()
+
+    async def fetch(result) -> str:
+        """Return the page text from the search result, scraping it if missing."""
+        url = result["url"]
+        if configurable.use_search_raw_content:
+            content = await raw_page(result)
+            if content:
+                return content
+        # Missing or truncated raw content: fall back to the scraper
+        scraped_urls.add(url)
+        try:
+            return await url_crawl(url, config)
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")  # noqa: T201
+            return ""
+
+    # Compare canonical forms so tracking params, AMP/mobile mirrors and
+    # www. variants of an already visited page are not scraped again
+    seen = set(existing_urls)
+    source_scores: Dict[str, float] = {}
+    results: Dict[str, dict] = {}
+    fetches: Dict[str, asyncio.Task] = {}
+    for finished in asyncio.as_completed([run_query(q) for q in queries]):
+        for result in await finished:
+            url = result["url"]
+            canonical = URLService.canonicalize_url(url)
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+
+            # Don't spend crawl budget on forums and content farms
+            score = SourceService.score_source(url, result.get("score"))
+            if score < configurable.min_source_score:
+                print(f"Skipping low-quality source ({score:.2f}): {url}")  # noqa: T201
+                continue
+            source_scores[url] = score
+            results[url] = result
+
+        # Fetch the current top sources while the other queries run. The
+        # pool only grows, so a source pushed out of the top never returns.
+        leaders = SourceService.top_sources(
+            source_scores, configurable.max_sources_per_call
+        )
+        for url in leaders:
+            if url not in fetches:
+                fetches[url] = asyncio.create_task(fetch(results[url]))
+        for url in set(fetches) - set(leaders):
+            fetches.pop(url).cancel()
+
+    new_urls = SourceService.top_sources(
+        source_scores, configurable.max_sources_per_call
+    )
+    source_scores = {url: source_scores[url] for url in new_urls}
+    contents = await asyncio.gather(*(fetches[url] for url in new_urls))
+    pages = dict(zip(new_urls, contents))
+    if cache is not None:
+        print(f"Search cache: {cache.stats}")  # noqa: T201
+
+    print(  # noqa: T201
+        f"Found {len(new_urls)} new sources for verification "
+        f"({len(new_urls) - len(scraped_urls & set(new_urls))} with search content, "
+        f"{len(scraped_urls & set(new_urls))} scraped)."
+    )
 
-    return Command(goto="process_batch", update={"target_urls": new_urls})
+    return Command(
+        goto="process_batch",
+        update={
+            "target_urls": new_urls,
+            "scraped_pages": pages,
+            "source_scores": source_scores,
+        },
+    )
 
 
 # 2. 批次處理節點
@@ -90,39 +252,151 @@ async def process_batch_node(
     if not urls:
         return Command(goto=END)
 
-    print(f"Batch processing {len(urls)} sources...")
+    configurable = Configuration.from_runnable_config(config)
+
+    # Extract from the best sources only, within the per-call budget
+    source_scores = state.get("source_scores") or {}
+    scores = {
+        url: source_scores[url]
+        if url in source_scores
+        else SourceService.score_source(url)
+        for url in urls
+    }
+    selected_urls = SourceService.top_sources(scores, configurable.max_sources_per_call)
+    if len(selected_urls) < len(urls):
+        print(f"Keeping top {len(selected_urls)} of {len(urls)} sources by quality.")  # noqa: T201
 
-    async def process_single_url(url):
+    print(f"Batch processing {len(selected_urls)} sources...")  # noqa: T201
+
+    scraped_pages = state.get("scraped_pages") or {}
+
+    async def load_page(url) -> Tuple[str, int | None]:
         try:
-            content = await url_crawl(url)
-            if not content:
-                return []
+            # Pages are normally scraped already by search_node
+            if url in scraped_pages:
+                content = scraped_pages[url]
+            else:
+                content = await url_crawl(url, config)
+            if not content or not configurable.skip_near_duplicates:
+                return content, None
+            return content, await run_cpu_bound(configurable, simhash, content)
+        except Exception as e:
+            print(f"Error processing {url}: {e}")  # noqa: T201
+            return "", None
 
-            # 3000 chars 確保有足夠上下文判斷研究結果
-            chunks = await chunk_text_by_tokens(
-                content, chunk_size=3000, overlap_size=100
-            )
+    loaded = await asyncio.gather(*[load_page(url) for url in selected_urls])
 
-            limit_chunks = chunks[:4]
-            events = await EventService.run_batch_extraction(
-                limit_chunks, url, claim, config
+    # Syndicated copies and mirrors add no new evidence. Pages are checked
+    # best source first, against pages extracted earlier in this run and the
+    # better pages of this batch, so the copy is what gets dropped.
+    detector = DuplicateDetector(
+        max_distance=configurable.near_duplicate_max_distance,
+        known=state.get("page_fingerprints"),
+    )
+    pages = []
+    fingerprints: Dict[str, int] = {}
+    for url, (content, fingerprint) in zip(selected_urls, loaded):
+        if not content:
+            continue
+        if fingerprint is not None:
+            duplicate_of = detector.find_duplicate(fingerprint, url)
+            if duplicate_of:
+                print(f"Skipping {url}: near-duplicate of {duplicate_of}")  # noqa: T201
+                continue
+            detector.add(url, fingerprint)
+            fingerprints[url] = fingerprint
+        pages.append((url, content))
+
+    # Tokenize all pages in one batch, and only as far as the chunks we keep
+    texts = [content for _, content in pages]
+    try:
+        if configurable.chunk_strategy == "structure":
+            records = await chunk_documents(
+                texts,
+                max_tokens=configurable.extraction_chunk_tokens,
+                max_chunks=configurable.max_chunks_per_page,
+                config=config,
             )
-            return events
+            page_chunks = [
+                [chunk.text(text) for chunk in chunks]
+                for text, chunks in zip(texts, records)
+            ]
+        else:
+            page_chunks = await chunk_texts_by_tokens(
+                texts,
+                chunk_size=configurable.extraction_chunk_tokens,
+                overlap_size=100,
+                max_chunks=configurable.max_chunks_per_page,
+                config=config,
+            )
+    except Exception as e:
+        print(f"Error chunking pages: {e}")  # noqa: T201
+        page_chunks = []
+
+    # Spend the extraction budget on the chunks most relevant to the claim,
+    # wherever they sit on their page, rather than on each page's first chunks
+    candidates = [
+        (url, chunk) for (url, _), chunks in zip(pages, page_chunks) for chunk in chunks
+    ]
+    relevance = await run_cpu_bound(
+        configurable,
+        RelevanceService.bm25_scores,
+        claim,
+        [chunk for _, chunk in candidates],
+    )
+    chosen = RelevanceService.top_k(relevance, configurable.max_extraction_chunks)
+    if not chosen:
+        # Nothing matches the claim's terms (e.g. a different language)
+        chosen = list(range(min(len(candidates), configurable.max_extraction_chunks)))
+    print(  # noqa: T201
+        f"Extracting from top {len(chosen)} of {len(candidates)} chunks by relevance."
+    )
+
+    chunks_by_url: Dict[str, List[str]] = {}
+    for i in sorted(chosen):
+        url, chunk = candidates[i]
+        chunks_by_url.setdefault(url, []).append(chunk)
+
+    # Pages whose extraction succeeded; only these count as seen for dedup
+    extracted_urls: List[str] = []
+
+    async def extract(url, chunks):
+        try:
+            events = await EventService.run_batch_extraction(chunks, url, claim, config)
         except Exception as e:
-            print(f"Error processing {url}: {e}")
+            print(f"Error processing {url}: {e}")  # noqa: T201
             return []
+        extracted_urls.append(url)
+        return events
 
-    results = await asyncio.gather(*[process_single_url(url) for url in urls])
+    results = await asyncio.gather(
+        *[extract(url, chunks) for url, chunks in chunks_by_url.items()]
+    )
     all_new_evidence = [e for batch in results for e in batch]
 
-    print(f"Batch complete. Total evidence points extracted: {len(all_new_evidence)}")
+    page_fingerprints = dict(state.get("page_fingerprints") or {})
+    for url in extracted_urls:
+        if url in fingerprints:
+            page_fingerprints[URLService.canonicalize_url(url)] = fingerprints[url]
+
+    print(f"Batch complete. Total evidence points extracted: {len(all_new_evidence)}")  # noqa: T201
+    lag = get_cpu_executor(configurable).metrics().get("loop_lag")
+    if lag and lag["samples"]:
+        print(  # noqa: T201
+            f"Event loop lag: p50 {lag['p50_ms']} ms, p99 {lag['p99_ms']} ms, "
+            f"max {lag['max_ms']} ms, {lag['stalls']} stalls"
+        )
 
     return Command(
         goto=END,
         update={
             "gathered_events": all_new_evidence,
-            "processed_urls": urls,
+            "processed_urls": set(state.get("processed_urls") or set())
+            | {URLService.canonicalize_url(url) for url in selected_urls},
             "target_urls": [],
+            "scraped_pages": {},
+            "source_scores": {},
+            "page_fingerprints": page_fingerprints,
         },
     )
 
@@ -0,0 +1,223 @@
+# src/research_events/search_backends.py
+"""Web and offline search backends."""
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from langchain_tavily import TavilySearch
+from src.configuration import Configuration
+from src.url_crawler.scrapers import HTMLToMarkdown
+
+
+class SearchBackend(ABC):
+    """A web or corpus search returning Tavily-shaped result dicts.
+
+    Each result has `url`, `title`, `content` (a snippet), `score` (0-1) and,
+    when requested, `raw_content` (the full document text).
+    """
+
+    name: str
+
+    @abstractmethod
+    async def search(
+        self, query: str, max_results: int, include_raw_content: bool
+    ) -> List[dict]:
+        """Return up to `max_results` results, best first."""
+
+
+class TavilySearchBackend(SearchBackend):
+    """Web search through the Tavily API."""
+
+    name = "tavily"
+
+    async def search(
+        self, query: str, max_results: int, include_raw_content: bool
+    ) -> List[dict]:
+        """Run one Tavily query."""
+        tavily = TavilySearch(
+            max_results=max_results,
+            include_answer=False,
+            include_raw_content="markdown" if include_raw_content else False,
+        )
+        response = await tavily.ainvoke({"query": query})
+        return response.get("results", [])
+
+
+class LocalCorpusSearchBackend(SearchBackend):
+    """Full-text search over a local directory of documents (SQLite FTS5).
+
+    Markdown, text and HTML files under `corpus_dir` are indexed into
+    `index_path`. The index is refreshed incrementally (new, changed and
+    deleted files) at most every `refresh_interval` seconds. Results point
+    at the files with `file://` URLs and always carry the document text as
+    `raw_content` when asked, so no scraping is needed.
+    """
+
+    name = "local"
+    EXTENSIONS = {".md", ".markdown", ".txt", ".html", ".htm"}
+
+    def __init__(self, corpus_dir: str, index_path: str, refresh_interval: float = 60):
+        """Index `corpus_dir` into the SQLite FTS5 database at `index_path`."""
+        self.corpus_dir = Path(corpus_dir).resolve()
+        self.refresh_interval = refresh_interval
+        self._last_refresh = 0.0
+
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents
+                USING fts5(url UNINDEXED, title, content, tokenize='porter unicode61');
+            CREATE TABLE IF NOT EXISTS indexed_files (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                doc_id INTEGER NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def refresh_index(self) -> int:
+        """Index new or changed files and drop deleted ones. Returns files indexed."""
+        with self._lock:
+            known = {
+                path: (mtime, doc_id)
+                for path, mtime, doc_id in self._conn.execute(
+                    "SELECT path, mtime, doc_id FROM indexed_files"
+                )
+            }
+            present = set()
+            indexed = 0
+
+            for path in self.corpus_dir.rglob("*"):
+                if path.suffix.lower() not in self.EXTENSIONS or not path.is_file():
+                    continue
+                key = str(path)
+                present.add(key)
+                mtime = path.stat().st_mtime
+                if key in known:
+                    if known[key][0] == mtime:
+                        continue
+                    self._conn.execute(
+                        "DELETE FROM documents WHERE rowid = ?", (known[key][1],)
+                    )
+
+                title, content = self._read_document(path)
+                cursor = self._conn.execute(
+                    "INSERT INTO documents (url, title, content) VALUES (?, ?, ?)",
+                    (path.as_uri(), title, content),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO indexed_files (path, mtime, doc_id) "
+                    "VALUES (?, ?, ?)",
+                    (key, mtime, cursor.lastrowid),
+                )
+                indexed += 1
+
+            for key in set(known) - present:
+                self._conn.execute(
+                    "DELETE FROM documents WHERE rowid = ?", (known[key][1],)
+                )
+                self._conn.execute("DELETE FROM indexed_files WHERE path = ?", (key,))
+
+            self._conn.commit()
+            self._last_refresh = time.monotonic()
+            return indexed
+
+    @staticmethod
+    def _read_document(path: Path) -> Tuple[str, str]:
+        text = path.read_text(encoding="utf-8", errors="replace")
+        if path.suffix.lower() in (".html", ".htm"):
+            parser = HTMLToMarkdown()
+            parser.feed(text)
+            parser.close()
+            text = parser.markdown()
+
+        title = path.stem.replace("-", " ").replace("_", " ")
+        for line in text.splitlines():
+            if line.startswith("#"):
+                title = line.lstrip("#").strip()
+                break
+        return title, text
+
+    async def search(
+        self, query: str, max_results: int, include_raw_content: bool
+    ) -> List[dict]:
+        """Rank documents with FTS5 bm25 against any of the query terms."""
+        if time.monotonic() - self._last_refresh > self.refresh_interval:
+            await asyncio.to_thread(self.refresh_index)
+
+        terms = _TERM.findall(query.lower())
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT url, title, snippet(documents, 2, '', '', '...', 32),
+                       bm25(documents), content
+                FROM documents
+                WHERE documents MATCH ?
+                ORDER BY bm25(documents)
+                LIMIT ?
+                """,
+                (match, max_results),
+            ).fetchall()
+
+        results = []
+        for url, title, snippet, rank, content in rows:
+            # bm25() is negative, more negative is better; map to 0-1
+            relevance = -rank
+            result = {
+                "url": url,
+                "title": title,
+                "content": snippet,
+                "score": round(relevance / (1 + relevance), 4),
+            }
+            if include_raw_content:
+                result["raw_content"] = content
+            results.append(result)
+        return results
+
+
+_TERM = re.compile(r"\w+")
+_backends: Dict[tuple, SearchBackend] = {}
+
+
+def get_search_backend(configurable: Configuration) -> SearchBackend:
+    """Return the configured search backend, built once per process."""
+    name = configurable.search_backend
+    if name == LocalCorpusSearchBackend.name:
+        key = (
+            name,
+            configurable.search_corpus_dir,
+            configurable.search_corpus_index_path,
+        )
+        if key not in _backends:
+            if not configurable.search_corpus_dir:
+                raise ValueError("search_backend 'local' requires search_corpus_dir")
+            _backends[key] = LocalCorpusSearchBackend(
+                corpus_dir=configurable.search_corpus_dir,
+                index_path=configurable.search_corpus_index_path,
+            )
+        return _backends[key]
+
+    if name == TavilySearchBackend.name:
+        key = (name,)
+        if key not in _backends:
+            _backends[key] = TavilySearchBackend()
+        return _backends[key]
+
+    raise ValueError(f"Unknown search backend '{name}'")
@@ -5,7 +5,7 @@ from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
 
 from src.state import RawEvent
-from src.llm_service import create_llm_structured_model
+from src.llm_service import PRIORITY_BULK, create_llm_cascade_model
 from src.prompts import EVENT_EXTRACTION_PROMPT
 
 
@@ -14,15 +14,31 @@ class RawEventList(BaseModel):
     events: List[RawEvent] = Field(default_factory=list)
 
 
+def has_complete_events(result: RawEventList) -> bool:
+    """Cascade check for extraction: every event has a description and category.
+
+    An empty list is a valid answer (most chunks hold no evidence), so it is
+    not escalated to a stronger model.
+    """
+    return result is not None and all(
+        event.description and event.category for event in result.events
+    )
+
+
 class EventService:
     @staticmethod
     async def extract_events_from_chunk(
-        chunk: str, source_url: str, topic: str, config: RunnableConfig
+        chunk: str,
+        source_url: str,
+        topic: str,
+        config: RunnableConfig,
+        raise_errors: bool = False,
     ) -> List[RawEvent]:
         """
         核心提取函數：
         輸入：一段文字 chunk
         輸出：結構化的事件列表 (RawEvent)
+        With `raise_errors`, a failed extraction raises instead of returning [].
         """
         # 1. 快速檢查：如果 chunk 太短或無意義，直接跳過 (節省 LLM 成本)
         if len(chunk.strip()) < 50:
@@ -30,7 +46,14 @@ class EventService:
 
         # 2. 使用 Gemeni Flash (或配置的模型) 進行結構化提取
         # 注意：這裡我們使用 RawEventList 作為 schema，強迫模型輸出列表
-        llm = create_llm_structured_model(config, class_name=RawEventList)
+        # 先用便宜的模型；解析失敗或事件缺欄位時才升級到較強的模型 (llm_cascades)
+        llm = create_llm_cascade_model(
+            "extraction",
+            config,
+            RawEventList,
+            check=has_complete_events,
+            priority=PRIORITY_BULK,
+        )
 
         try:
             # 3. 執行調用
@@ -54,6 +77,8 @@ class EventService:
         except Exception as e:
             # 容錯處理：如果提取失敗，不要讓整個程式崩潰，只打印錯誤並返回空列表
             print(f"⚠️ Extraction error for chunk from {source_url}: {e}")
+            if raise_errors:
+                raise
             return []
 
     @staticmethod
@@ -62,18 +87,25 @@ class EventService:
     ) -> List[RawEvent]:
         """
         批次處理函數：同時處理多個 chunk，極大化速度
+        Raises the first error when every chunk failed, so callers can tell a
+        failed page from one without events.
         """
         if not chunks:
             return []
 
         # 建立任務列表
         tasks = [
-            EventService.extract_events_from_chunk(chunk, source_url, topic, config)
+            EventService.extract_events_from_chunk(
+                chunk, source_url, topic, config, raise_errors=True
+            )
             for chunk in chunks
         ]
 
         # 並發執行 (asyncio.gather) - 這是速度提升的關鍵
-        results = await asyncio.gather(*tasks)
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        results = [r for r in outcomes if not isinstance(r, Exception)]
+        if not results:
+            raise outcomes[0]
 
         # 展平結果 (Flatten List of Lists)
         # [[e1, e2], [e3], []] -> [e1, e2, e3]
@@ -0,0 +1,70 @@
+# src/services/relevance_service.py
+"""BM25 relevance scoring of chunks against a claim."""
+
+import math
+import re
+from collections import Counter
+from typing import List
+
+_TERM = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by can could did do does for from had has
+    have how if in into is it its more most no not of on or so such than that
+    the their them there these they this those to was were what when where which
+    who why will with would you your people really true false
+    """.split()
+)
+
+# Standard BM25 parameters: term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class RelevanceService:
+    """Scores text against a query with BM25."""
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Lowercased word terms without stopwords."""
+        return [term for term in _TERM.findall(text.lower()) if term not in STOPWORDS]
+
+    @staticmethod
+    def bm25_scores(query: str, documents: List[str]) -> List[float]:
+        """BM25 score of every document against the query terms.
+
+        Document frequencies come from `documents` themselves, so scores are
+        comparable across all chunks of a batch, whichever page they came from.
+        """
+        query_terms = set(RelevanceService.tokenize(query))
+        if not documents or not query_terms:
+            return [0.0] * len(documents)
+
+        term_counts = [Counter(RelevanceService.tokenize(doc)) for doc in documents]
+        lengths = [sum(counts.values()) for counts in term_counts]
+        avg_length = sum(lengths) / len(lengths) or 1.0
+
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for counts in term_counts if term in counts)
+            idf[term] = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+
+        scores = []
+        for counts, length in zip(term_counts, lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            score = 0.0
+            for term in query_terms:
+                tf = counts.get(term, 0)
+                if tf:
+                    score += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            scores.append(round(score, 4))
+        return scores
+
+    @staticmethod
+    def top_k(scores: List[float], k: int) -> List[int]:
+        """Return the indices of the `k` best scores, best first; ties keep input order.
+
+        Documents that match no query term at all are never selected.
+        """
+        ranked = sorted(range(len(scores)), key=lambda i: -scores[i])
+        return [i for i in ranked if scores[i] > 0][:k]
@@ -0,0 +1,117 @@
+# src/services/source_service.py
+"""Source quality scoring and ranking."""
+
+import re
+from typing import Dict, List
+
+from src.services.url_service import URLService
+
+# Domain tiers: how much a source of this kind is worth as evidence.
+# Matched against the host and its parent domains (e.g. pubmed.ncbi.nlm.nih.gov -> nih.gov).
+DOMAIN_TIERS: Dict[str, float] = {
+    # Journals, academic indexes and publishers
+    "nature.com": 1.0,
+    "science.org": 1.0,
+    "thelancet.com": 1.0,
+    "nejm.org": 1.0,
+    "bmj.com": 1.0,
+    "jamanetwork.com": 1.0,
+    "cell.com": 1.0,
+    "cochranelibrary.com": 1.0,
+    "sciencedirect.com": 0.95,
+    "springer.com": 0.95,
+    "wiley.com": 0.95,
+    "plos.org": 0.95,
+    "frontiersin.org": 0.9,
+    "arxiv.org": 0.85,
+    "doi.org": 0.95,
+    # Public health and government bodies
+    "who.int": 0.95,
+    "cdc.gov": 0.95,
+    "nih.gov": 0.95,
+    "fda.gov": 0.9,
+    "nasa.gov": 0.9,
+    "europa.eu": 0.85,
+    # Reference works and fact-checkers
+    "britannica.com": 0.7,
+    "wikipedia.org": 0.65,
+    "snopes.com": 0.7,
+    "factcheck.org": 0.7,
+    "politifact.com": 0.7,
+    "fullfact.org": 0.7,
+    "scientificamerican.com": 0.7,
+    # News agencies and major outlets
+    "reuters.com": 0.6,
+    "apnews.com": 0.6,
+    "bbc.com": 0.6,
+    "bbc.co.uk": 0.6,
+    "npr.org": 0.55,
+    "nytimes.com": 0.55,
+    "theguardian.com": 0.55,
+    "washingtonpost.com": 0.55,
+    "newscientist.com": 0.6,
+    # Forums, social media and user-generated content
+    "reddit.com": 0.15,
+    "quora.com": 0.1,
+    "medium.com": 0.2,
+    "facebook.com": 0.05,
+    "instagram.com": 0.05,
+    "tiktok.com": 0.05,
+    "pinterest.com": 0.05,
+    "twitter.com": 0.1,
+    "x.com": 0.1,
+    "youtube.com": 0.15,
+}
+# Top-level suffixes reserved for institutions
+SUFFIX_TIERS = [
+    (re.compile(r"\.(gov|mil)(\.[a-z]{2})?$"), 0.9),
+    (re.compile(r"\.(edu|ac\.[a-z]{2}|edu\.[a-z]{2})$"), 0.85),
+]
+DEFAULT_TIER = 0.4
+
+URL_BONUS_PATTERNS = re.compile(
+    r"/doi/|/abs/|/full/|/article|/study|/research|/pmc/|meta-analysis|systematic-review|\.pdf$",
+    re.IGNORECASE,
+)
+URL_PENALTY_PATTERNS = re.compile(
+    r"/tag/|/tags/|/category/|/search|/shop|/product|top-\d+|\d+-best|best-|listicle|/forum|/thread|/comments/",
+    re.IGNORECASE,
+)
+
+TIER_WEIGHT = 0.6
+SEARCH_WEIGHT = 0.3
+PATTERN_ADJUSTMENT = 0.1
+
+
+class SourceService:
+    """Scores sources by domain reputation and picks the best ones to read."""
+
+    @staticmethod
+    def domain_tier(url: str) -> float:
+        """Evidence tier of the URL's domain, from 0 (worthless) to 1 (journal)."""
+        host = URLService.extract_domain(URLService.canonicalize_url(url)).split(":")[0]
+        labels = host.split(".")
+        for i in range(len(labels) - 1):
+            tier = DOMAIN_TIERS.get(".".join(labels[i:]))
+            if tier is not None:
+                return tier
+        for pattern, tier in SUFFIX_TIERS:
+            if pattern.search(host):
+                return tier
+        return DEFAULT_TIER
+
+    @staticmethod
+    def score_source(url: str, search_score: float | None = None) -> float:
+        """Combine domain tier, search relevance and URL patterns into a 0-1 score."""
+        score = TIER_WEIGHT * SourceService.domain_tier(url)
+        score += SEARCH_WEIGHT * min(max(search_score or 0.0, 0.0), 1.0)
+        if URL_BONUS_PATTERNS.search(url):
+            score += PATTERN_ADJUSTMENT
+        if URL_PENALTY_PATTERNS.search(url):
+            score -= PATTERN_ADJUSTMENT
+        return round(min(max(score, 0.0), 1.0), 4)
+
+    @staticmethod
+    def top_sources(scores: Dict[str, float], budget: int) -> List[str]:
+        """URLs with the highest scores, best first, at most `budget` of them."""
+        return sorted(scores, key=scores.get, reverse=True)[:budget]
@@ -1,6 +1,17 @@
-from urllib.parse import urlparse
+from urllib.parse import parse_qsl, urlencode, urlparse, urlsplit, urlunsplit
 from typing import List
 
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "_ga", "_gl", "_hsenc", "_hsmi", "spm", "cmpid",
+    "amp", "outputtype", "s_cid",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+# Host labels used for mobile / AMP mirrors (m.example.com, en.m.wikipedia.org)
+MIRROR_HOST_LABELS = {"www", "m", "mobile", "amp"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
 
 class URLService:
     @staticmethod
@@ -8,6 +19,46 @@ class URLService:
         """Extract domain from URL."""
         return urlparse(url).netloc
     
+    @staticmethod
+    def canonicalize_url(url: str) -> str:
+        """Normalize a URL so variants of the same page compare equal.
+
+        Lowercases scheme and host, treats http as https, drops `www.`,
+        mobile and AMP host labels, default ports, fragments, `/amp` path
+        suffixes, trailing slashes and tracking query parameters, and sorts
+        the remaining parameters.
+        """
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        if scheme == "http":
+            scheme = "https"
+
+        host = (parts.hostname or "").lower()
+        labels = host.split(".")
+        while len(labels) > 2 and labels[0] in MIRROR_HOST_LABELS:
+            labels = labels[1:]
+        if len(labels) > 2 and labels[1] in MIRROR_HOST_LABELS:
+            labels = labels[:1] + labels[2:]
+        host = ".".join(labels)
+        if parts.port and parts.port != DEFAULT_PORTS.get(parts.scheme.lower()):
+            host = f"{host}:{parts.port}"
+
+        path = parts.path
+        for suffix in ("/amp/", "/amp", ".amp"):
+            if path.endswith(suffix):
+                path = path[: -len(suffix)]
+                break
+        path = path.rstrip("/") or "/"
+
+        query = sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS
+            and not key.lower().startswith(TRACKING_PREFIXES)
+        )
+
+        return urlunsplit((scheme, host, path, urlencode(query), ""))
+
     @staticmethod
     def update_url_list(urls: List[str], used_domains: List[str]) -> tuple[List[str], List[str]]:
         """Remove first URL from list and track its domain."""
@@ -0,0 +1,143 @@
+# src/sqlite_cache.py
+"""Persistent SQLite key/value store with a TTL and an LRU size cap."""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Tuple
+
+
+class SQLiteCache:
+    """SQLite-backed store of text values, one table per subclass.
+
+    Entries expire after `ttl_seconds`. When the stored values grow past
+    `max_bytes`, the least recently used entries are evicted first.
+    Subclasses set `table` and add their own key and value handling.
+    """
+
+    table = "cache"
+
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int):
+        """Open (or create) the cache database at `path`."""
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed "
+            f"ON {self.table} (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get_value(self, key: str) -> str | None:
+        """Return the stored value for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return value
+
+    def set_value(self, key: str, value: str) -> None:
+        """Store `value` under `key` and evict old entries if over budget."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove the entry for `key`, if any."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then LRU rows until under the size cap."""
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE created_at < ?",
+            (now - self.ttl_seconds,),
+        )
+        total = self._conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @classmethod
+    def shared(cls, path: str, ttl_seconds: int, max_bytes: int) -> "SQLiteCache":
+        """Return the process-wide cache of this kind for `path`.
+
+        One connection per database file: the TTL and size cap of the first
+        caller to open a path apply to every later caller using it.
+        """
+        key = (cls, path)
+        if key not in _shared:
+            _shared[key] = cls(path, ttl_seconds, max_bytes)
+        return _shared[key]
+
+
+# Global cache instances, one per cache kind and database path
+_shared: Dict[Tuple[type, str], SQLiteCache] = {}
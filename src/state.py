@@ -1,6 +1,6 @@
 import operator
 import uuid
-from typing import Annotated, List, TypedDict, Optional
+from typing import Annotated, Dict, List, Set, TypedDict, Optional
 from langchain_core.messages import MessageLikeRepresentation
 from pydantic import BaseModel, Field, field_validator
 
@@ -121,7 +121,10 @@ def override_reducer(current_value, new_value):
 class ResearchState(TypedDict):
     research_question: str
     target_urls: List[str]
-    processed_urls: List[str]
+    processed_urls: Set[str]  # Canonical URLs already scraped
+    scraped_pages: Dict[str, str]  # url -> content scraped during search
+    source_scores: Dict[str, float]  # url -> source quality score
+    page_fingerprints: Dict[str, int]  # canonical url -> SimHash of extracted pages
     gathered_events: Annotated[List[RawEvent], operator.add]
     final_evidence: List[EvidencePoint]  # Output
 
@@ -135,6 +138,8 @@ class SupervisorState(TypedDict):
     conversation_history: Annotated[list[MessageLikeRepresentation], override_reducer]
     iteration_count: int
     events_summary: str
+    visited_urls: Set[str]  # Canonical URLs scraped in earlier research calls
+    page_fingerprints: Dict[str, int]  # SimHash of pages extracted in this run
 
     # [UPDATED] 最終結果存這裡
     evidence_points: List[EvidencePoint]
@@ -0,0 +1,104 @@
+"""Tests for batched chunk classification in the chunk graph and merge filter."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.research_events import chunk_graph
+from src.research_events.merge_events import merge_events_graph
+
+CHUNKS = [f"Chunk number {i} describing something." for i in range(5)]
+
+
+def _models(batch_answers, single_answer=True):
+    """Fake classifier models for grouped and one-by-one prompts."""
+    batch_model = MagicMock()
+    batch_model.abatch = AsyncMock(return_value=batch_answers)
+    single_model = MagicMock()
+    single_model.abatch = AsyncMock(
+        side_effect=lambda prompts, **kwargs: [
+            chunk_graph.DramaEventCheck(contains_drama_event=single_answer)
+            for _ in prompts
+        ]
+    )
+
+    def create(config, class_name, **kwargs):
+        if class_name is chunk_graph.DramaEventBatchCheck:
+            return batch_model
+        return single_model
+
+    return create, batch_model, single_model
+
+
+async def test_chunks_are_classified_several_per_prompt():
+    """With a batch size, each prompt covers several chunks."""
+    answers = [
+        chunk_graph.DramaEventBatchCheck(contains_drama_event=[True, False]),
+        chunk_graph.DramaEventBatchCheck(contains_drama_event=[False, True]),
+        chunk_graph.DramaEventBatchCheck(contains_drama_event=[True]),
+    ]
+    create, batch_model, single_model = _models(answers)
+    config = {
+        "configurable": {
+            "chunk_prefilter_enabled": False,
+            "chunk_classifier_batch_size": 2,
+        }
+    }
+
+    with patch.object(chunk_graph, "create_llm_chunk_model", side_effect=create):
+        update = await chunk_graph.check_chunk_for_events({"chunks": CHUNKS}, config)
+
+    verdicts = [r.contains_drama_event for r in update["results"].values()]
+    assert verdicts == [True, False, False, True, True]
+    prompts = batch_model.abatch.await_args.args[0]
+    assert len(prompts) == 3 and CHUNKS[0] in prompts[0] and CHUNKS[1] in prompts[0]
+    single_model.abatch.assert_not_awaited()
+
+
+async def test_malformed_group_answer_falls_back_to_single_chunks():
+    """A group answered with the wrong number of flags is re-asked per chunk."""
+    answers = [
+        chunk_graph.DramaEventBatchCheck(contains_drama_event=[True]),
+        ValueError("model failed"),
+        chunk_graph.DramaEventBatchCheck(contains_drama_event=[False]),
+    ]
+    create, _, single_model = _models(answers, single_answer=True)
+    config = {
+        "configurable": {
+            "chunk_prefilter_enabled": False,
+            "chunk_classifier_batch_size": 2,
+        }
+    }
+
+    with patch.object(chunk_graph, "create_llm_chunk_model", side_effect=create):
+        update = await chunk_graph.check_chunk_for_events({"chunks": CHUNKS}, config)
+
+    verdicts = [r.contains_drama_event for r in update["results"].values()]
+    assert verdicts == [True, True, True, True, False]
+    assert single_model.abatch.await_count == 2
+
+
+async def test_merge_filter_groups_pieces_across_chunks():
+    """filter_chunks classifies every piece of every chunk in one grouped pass."""
+    chunks = ["a" * 3000, "b" * 3000]
+    answers = [
+        chunk_graph.DramaEventBatchCheck(
+            contains_drama_event=[False, False, True, False]
+        )
+    ]
+    create, batch_model, single_model = _models(answers)
+    config = {
+        "configurable": {
+            "chunk_prefilter_enabled": False,
+            "chunk_classifier_batch_size": 4,
+            "max_chunks": 5,
+        }
+    }
+
+    with patch.object(chunk_graph, "create_llm_chunk_model", side_effect=create):
+        command = await merge_events_graph.filter_chunks(
+            {"text_chunks": chunks, "research_question": "claim"}, config
+        )
+
+    assert command.update["text_chunks"] == [chunks[1]]
+    assert batch_model.abatch.await_count == 1
+    assert len(batch_model.abatch.await_args.args[0]) == 1
+    single_model.abatch.assert_not_awaited()
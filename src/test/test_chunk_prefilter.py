@@ -0,0 +1,74 @@
+"""Tests for the local chunk pre-filter."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.research_events import chunk_graph
+from src.research_events.chunk_prefilter import (
+    ChunkPrefilter,
+    score_chunk,
+)
+
+CLAIM = "Does sugar cause hyperactivity in children?"
+STUDY = (
+    "A 1995 meta-analysis of 16 double-blind trials found that sugar does not "
+    "affect behaviour or cognition in children. Hyperactivity scores were "
+    "unchanged in 94% of participants."
+)
+BOILERPLATE = (
+    "Home News Sport Subscribe to our newsletter. Sign in. Privacy policy. "
+    "Terms of use. All rights reserved. Follow us on social media. Read more."
+)
+OFF_TOPIC = (
+    "According to the company's 2023 annual report, data from its retail "
+    "division found that revenue grew 12% while operating costs fell 4% "
+    "across 300 stores in 2023."
+)
+UNCERTAIN = (
+    "Many parents believe that sugar changes how their children behave at "
+    "parties, and the idea is repeated in magazines and on television."
+)
+
+
+def test_score_chunk_separates_evidence_from_boilerplate():
+    """Findings with figures score high, menus and footers score zero."""
+    assert score_chunk(STUDY, CLAIM) >= 0.6
+    assert score_chunk(BOILERPLATE, CLAIM) == 0.0
+    assert 0.1 < score_chunk(UNCERTAIN, CLAIM) < 0.6
+    assert score_chunk("Too short.", CLAIM) == 0.0
+
+
+async def test_only_uncertain_chunks_reach_the_classifier():
+    """Confident chunks are decided locally and counted."""
+    model = MagicMock()
+    model.abatch = AsyncMock(
+        return_value=[chunk_graph.DramaEventCheck(contains_drama_event=True)]
+    )
+    prefilter = ChunkPrefilter(reject_below=0.1, accept_above=0.6)
+
+    with (
+        patch.object(chunk_graph, "create_llm_chunk_model", return_value=model),
+        patch.object(chunk_graph, "get_chunk_prefilter", return_value=prefilter),
+    ):
+        update = await chunk_graph.check_chunk_for_events(
+            {
+                "chunks": [STUDY, BOILERPLATE, UNCERTAIN],
+                "research_question": CLAIM,
+            },
+            {"configurable": {}},
+        )
+
+    verdicts = [r.contains_drama_event for r in update["results"].values()]
+    assert verdicts == [True, False, True]
+    prompts = model.abatch.await_args.args[0]
+    assert len(prompts) == 1 and UNCERTAIN in prompts[0]
+    assert prefilter.stats == {"accepted": 1, "rejected": 1, "uncertain": 1}
+
+
+def test_off_topic_or_claimless_chunks_are_not_accepted_locally():
+    """Signal words and figures alone never skip the classifier."""
+    prefilter = ChunkPrefilter(reject_below=0.1, accept_above=0.6)
+
+    assert score_chunk(OFF_TOPIC, CLAIM) >= 0.6
+    assert prefilter.classify(OFF_TOPIC, CLAIM) is None
+    assert prefilter.classify(STUDY, "") is None
+    assert prefilter.classify(STUDY, CLAIM) is True
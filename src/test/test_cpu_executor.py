@@ -0,0 +1,75 @@
+"""Tests for the CPU executor and loop-lag monitor."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.configuration import Configuration
+from src.url_crawler.cpu_executor import (
+    CPUExecutor,
+    LoopLagMonitor,
+    get_cpu_executor,
+    shutdown_cpu_executor,
+)
+
+
+@pytest.mark.asyncio
+async def test_executor_bounds_pending_jobs_and_keeps_loop_free():
+    """Jobs run in the pool, at most `max_pending` at a time."""
+    pool = ThreadPoolExecutor(max_workers=8)
+    executor = CPUExecutor(pool, max_pending=2)
+    loop_thread = threading.get_ident()
+
+    def work(i):
+        time.sleep(0.02)
+        return i, threading.get_ident()
+
+    results = await asyncio.gather(*[executor.run(work, i) for i in range(6)])
+    pool.shutdown()
+
+    assert [i for i, _ in results] == list(range(6))
+    assert all(thread != loop_thread for _, thread in results)
+    assert executor.stats["peak_pending"] == 2
+    assert executor.stats["completed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_lag_monitor_reports_blocked_loop():
+    """Blocking the loop shows up as lag and a stall."""
+    monitor = LoopLagMonitor(warn_ms=100, interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.05)
+
+    time.sleep(0.2)  # block the event loop
+    await asyncio.sleep(0.05)
+    monitor.stop()
+
+    metrics = monitor.metrics()
+    assert metrics["stalls"] == 1
+    assert metrics["max_ms"] >= 150
+
+
+def test_lag_monitor_is_stopped_when_the_loop_changes():
+    """Moving to a new event loop cancels the old loop's monitor."""
+    configurable = Configuration(loop_lag_warn_ms=100)
+
+    async def executor():
+        return get_cpu_executor(configurable)
+
+    old_loop, new_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        old = old_loop.run_until_complete(executor())
+        task = old.lag_monitor._task
+        new = new_loop.run_until_complete(executor())
+        old_loop.run_until_complete(asyncio.sleep(0))
+
+        assert new is not old
+        assert task.done()
+        assert not new.lag_monitor._task.done()
+    finally:
+        shutdown_cpu_executor()
+        new_loop.run_until_complete(asyncio.sleep(0))
+        old_loop.close()
+        new_loop.close()
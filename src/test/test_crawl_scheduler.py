@@ -0,0 +1,57 @@
+"""Tests for the crawl scheduler."""
+
+import asyncio
+
+import pytest
+from src.url_crawler.crawl_scheduler import CrawlScheduler
+
+
+async def _run_crawls(scheduler: CrawlScheduler, urls: list[str]) -> dict:
+    """Run fake crawls through the scheduler and record peak concurrency."""
+    in_flight = {"total": 0, "peak_total": 0, "per_domain": {}, "peak_domain": 0}
+
+    async def crawl(url):
+        domain = url.split("/")[2]
+        async with scheduler.slot(url):
+            in_flight["total"] += 1
+            in_flight["per_domain"][domain] = in_flight["per_domain"].get(domain, 0) + 1
+            in_flight["peak_total"] = max(in_flight["peak_total"], in_flight["total"])
+            in_flight["peak_domain"] = max(
+                in_flight["peak_domain"], in_flight["per_domain"][domain]
+            )
+            await asyncio.sleep(0.01)
+            in_flight["total"] -= 1
+            in_flight["per_domain"][domain] -= 1
+
+    await asyncio.gather(*[crawl(url) for url in urls])
+    return in_flight
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_global_and_per_domain_concurrency():
+    """No more than the configured number of crawls run at once."""
+    scheduler = CrawlScheduler(
+        max_concurrency=3, per_domain_concurrency=1, requests_per_second=0, burst=1
+    )
+    urls = [f"https://site{i % 4}.com/page{i}" for i in range(12)]
+
+    stats = await _run_crawls(scheduler, urls)
+
+    assert stats["peak_total"] <= 3
+    assert stats["peak_domain"] == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_rate_limits_requests():
+    """Requests beyond the burst wait for the token bucket to refill."""
+    scheduler = CrawlScheduler(
+        max_concurrency=10, per_domain_concurrency=10, requests_per_second=50, burst=2
+    )
+    urls = [f"https://example.com/page{i}" for i in range(6)]
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await _run_crawls(scheduler, urls)
+
+    # Two requests start immediately, the other four need ~4/50 s of refill.
+    assert loop.time() - start >= 0.07
@@ -0,0 +1,82 @@
+"""Tests for local repair of malformed structured model output."""
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage
+from src.core.json_repair import (
+    parse_tool_args,
+    repair_json,
+    repair_stats,
+    validate_with_salvage,
+)
+from src.llm_service import _parse_structured
+from src.services.event_service import RawEventList
+from src.state import FactCheckReport
+
+
+def test_repair_json_fixes_fences_commas_and_quotes():
+    """Code fences, trailing commas, Python reprs and raw newlines are accepted."""
+    fenced = '```json\n{"events": [{"description": "a", "category": "science"},]}\n```'
+    assert repair_json(fenced) == {
+        "events": [{"description": "a", "category": "science"}]
+    }
+    assert repair_json("Result: {'ok': True, 'note': None}") == {
+        "ok": True,
+        "note": None,
+    }
+    assert repair_json('{"text": "line\nbreak"}') == {"text": "line\nbreak"}
+
+
+def test_repair_json_closes_truncated_output():
+    """Open strings and brackets are closed; a half-written key is dropped."""
+    assert repair_json('{"events": [{"description": "cut of') == {
+        "events": [{"description": "cut of"}]
+    }
+    assert repair_json('{"events": [{"description": "a"}, {"descr') == {
+        "events": [{"description": "a"}, {}]
+    }
+    with pytest.raises(ValueError):
+        repair_json("no json here")
+
+
+def test_salvage_keeps_valid_list_items():
+    """Invalid list items are dropped and counted; the valid ones are kept."""
+    dropped = repair_stats["dropped_items"]
+    data = {"events": '[{"description": "a", "category": "science"}, {"category": 1}]'}
+    result = validate_with_salvage(RawEventList, data)
+    assert [e.description for e in result.events] == ["a"]
+    assert repair_stats["dropped_items"] == dropped + 1
+
+    # A bare list for a single-list schema
+    result = validate_with_salvage(
+        RawEventList, [{"description": "b", "category": "origin"}]
+    )
+    assert result.events[0].description == "b"
+
+
+def test_parse_tool_args_accepts_strings():
+    """Tool args may be a dict or a (truncated) JSON string; junk gives {}."""
+    assert parse_tool_args({"a": 1}) == {"a": 1}
+    assert parse_tool_args('{"research_question": "is it tru') == {
+        "research_question": "is it tru"
+    }
+    assert parse_tool_args("garbage") == {}
+
+
+def test_structured_output_is_repaired_before_asking_again():
+    """Truncated output is repaired locally; prose with no JSON still fails."""
+    parse = _parse_structured(FactCheckReport)
+    truncated = AIMessage(
+        content='{"evidence_points": [{"topic": "Study", "details": "n=120", "stance": "Debunks"}, {"top'
+    )
+    result = parse({"raw": truncated, "parsed": None, "parsing_error": ValueError()})
+    assert [p.topic for p in result.evidence_points] == ["Study"]
+
+    with pytest.raises(OutputParserException):
+        parse(
+            {
+                "raw": AIMessage(content="I cannot answer that."),
+                "parsed": None,
+                "parsing_error": ValueError(),
+            }
+        )
@@ -0,0 +1,412 @@
+"""Tests for memoized configuration, model chains, caching, budgets, retries and cascades."""
+
+import asyncio
+import threading
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, ValidationError
+from src import llm_service
+from src.configuration import Configuration
+from src.llm_service import (
+    PRIORITY_BULK,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    CachedModel,
+    CascadeModel,
+    LLMResponseCache,
+    ProviderBudget,
+    ResilientModel,
+    RetryPolicy,
+    classify_error,
+    create_llm_cascade_model,
+    create_llm_chunk_model,
+    create_llm_structured_model,
+    create_llm_with_tools,
+    default_output_check,
+    retry_after_seconds,
+)
+from src.services.event_service import RawEventList, has_complete_events
+from src.state import RawEvent
+
+
+class _Answer(BaseModel):
+    ok: bool
+
+
+def test_configuration_is_memoized_per_configurable_values():
+    """Same values give the same instance; run-only keys are ignored."""
+    first = Configuration.from_runnable_config(
+        {"configurable": {"max_chunks": 7, "thread_id": "a"}}
+    )
+    second = Configuration.from_runnable_config(
+        {"configurable": {"max_chunks": 7, "thread_id": "b"}}
+    )
+    other = Configuration.from_runnable_config({"configurable": {"max_chunks": 8}})
+
+    assert first is second
+    assert first.max_chunks == 7 and other.max_chunks == 8
+
+
+def test_configuration_rereads_environment(monkeypatch):
+    """Environment overrides win over configurable and changes apply at once."""
+    configurable = {"configurable": {"max_chunks": 2}}
+    assert Configuration.from_runnable_config(configurable).max_chunks == 2
+
+    monkeypatch.setenv("MAX_CHUNKS", "11")
+    assert Configuration.from_runnable_config(configurable).max_chunks == 11
+
+    monkeypatch.delenv("MAX_CHUNKS")
+    assert Configuration.from_runnable_config(configurable).max_chunks == 2
+
+
+def test_model_chains_are_built_once_per_key():
+    """Chains are reused across calls and keyed by schema and model."""
+    llm_service.clear_runnable_cache()
+
+    structured = create_llm_structured_model({}, class_name=_Answer)
+    assert create_llm_structured_model({}, class_name=_Answer) is structured
+    assert create_llm_structured_model({}) is not structured
+    assert create_llm_chunk_model({}, class_name=_Answer) is not structured
+
+    other_model = create_llm_structured_model(
+        {"configurable": {"structured_llm_model": "openai:gpt-4o-mini"}},
+        class_name=_Answer,
+    )
+    assert other_model is not structured
+    assert llm_service.runnable_cache_stats == {"hits": 1, "misses": 4}
+
+    llm_service.clear_runnable_cache()
+    assert llm_service.runnable_cache_stats == {"hits": 0, "misses": 0}
+
+
+def test_tool_chains_are_keyed_by_tool_schema():
+    """Tools sharing a name but not a schema get separate chains."""
+    llm_service.clear_runnable_cache()
+
+    class Lookup(BaseModel):
+        query: str
+
+    first = create_llm_with_tools([Lookup], {})
+
+    class Lookup(BaseModel):  # noqa: F811 - same name, new schema
+        query: str
+        limit: int
+
+    assert create_llm_with_tools([Lookup], {}) is not first
+
+
+async def test_response_cache_serves_repeated_prompts(tmp_path):
+    """A repeated prompt is answered from SQLite as the parsed object."""
+    calls = []
+
+    def answer(prompt):
+        calls.append(prompt)
+        return _Answer(ok=True)
+
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), 3600, 1024 * 1024)
+    model = CachedModel(RunnableLambda(answer), cache, "model-a", _Answer)
+    messages = [SystemMessage(content="Judge"), HumanMessage(content="Is it true?")]
+
+    first = await model.ainvoke(messages)
+    # Fresh message objects (new ids) with the same content still hit
+    second = await model.ainvoke(
+        [SystemMessage(content="Judge"), HumanMessage(content="Is it true?")]
+    )
+    other = CachedModel(RunnableLambda(answer), cache, "model-b", _Answer)
+    await other.ainvoke(messages)
+
+    assert first == second == _Answer(ok=True)
+    assert isinstance(second, _Answer)
+    assert len(calls) == 2
+    assert cache.stats["hits"] == 1
+
+
+async def test_response_cache_runs_off_the_event_loop(tmp_path):
+    """Async lookups and stores happen in a worker thread, not on the loop."""
+    loop_thread = threading.get_ident()
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), 3600, 1024 * 1024)
+    threads = []
+    get, set_ = cache.get, cache.set
+
+    def recording_get(key, schema):
+        threads.append(threading.get_ident())
+        return get(key, schema)
+
+    def recording_set(key, value):
+        threads.append(threading.get_ident())
+        return set_(key, value)
+
+    cache.get, cache.set = recording_get, recording_set
+    model = CachedModel(RunnableLambda(lambda p: _Answer(ok=True)), cache, "m", _Answer)
+    await model.ainvoke("prompt")
+
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_response_cache_revalidates_stored_outputs(tmp_path):
+    """Outputs are stored as JSON; one that no longer fits the schema is a miss."""
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), 3600, 1024 * 1024)
+    cache.set("key", _Answer(ok=True))
+
+    assert cache.get_value("key") == '{"ok":true}'
+    assert cache.get("key", _Answer) == _Answer(ok=True)
+
+    cache.set_value("key", '{"ok": "maybe"}')
+    assert cache.get("key", _Answer) is None
+    assert cache.get_value("key") is None
+
+
+def test_response_cache_is_opt_in(tmp_path):
+    """Chains are only wrapped when llm_cache_enabled is set."""
+    llm_service.clear_runnable_cache()
+    path = str(tmp_path / "llm.sqlite")
+
+    plain = create_llm_structured_model({}, class_name=_Answer)
+    cached = create_llm_structured_model(
+        {"configurable": {"llm_cache_enabled": True, "llm_cache_path": path}},
+        class_name=_Answer,
+    )
+
+    assert not isinstance(plain, CachedModel)
+    assert isinstance(cached, CachedModel)
+
+
+async def test_governor_admits_by_priority_within_concurrency():
+    """Queued calls are admitted highest priority first, never above the cap."""
+    budget = ProviderBudget(
+        requests_per_minute=6000, tokens_per_minute=10**9, max_concurrency=1
+    )
+    order = []
+
+    async def call(name, priority):
+        await budget.acquire(100, priority)
+        order.append(name)
+        await asyncio.sleep(0.01)
+        budget.release()
+
+    first = asyncio.create_task(call("first", PRIORITY_BULK))
+    await asyncio.sleep(0)
+    await asyncio.gather(
+        first,
+        call("bulk", PRIORITY_BULK),
+        call("normal", PRIORITY_NORMAL),
+        call("supervisor", PRIORITY_HIGH),
+    )
+
+    assert order == ["first", "supervisor", "normal", "bulk"]
+    assert budget.stats["peak_queue"] == 3
+
+
+async def test_governor_applies_backpressure_on_request_budget():
+    """Calls beyond the per-minute request budget wait for it to refill."""
+    budget = ProviderBudget(
+        requests_per_minute=1200, tokens_per_minute=10**9, max_concurrency=10
+    )
+    budget._requests = 2  # two requests left in the bucket
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(4):
+        await budget.acquire(10)
+        budget.release()
+
+    # 1200/min is 20/s: the third and fourth calls wait ~50 ms each
+    assert loop.time() - start >= 0.09
+    assert budget.stats["waited"] == 2
+
+
+async def test_high_priority_call_does_not_wait_for_bulk_refill():
+    """A small urgent call queued behind a large bulk call is timed for itself."""
+    budget = ProviderBudget(
+        requests_per_minute=6000, tokens_per_minute=6000, max_concurrency=10
+    )
+    await budget.acquire(6000, PRIORITY_BULK)  # empties the token bucket
+    bulk = asyncio.create_task(budget.acquire(6000, PRIORITY_BULK))
+    await asyncio.sleep(0)  # bulk now waits ~60s for a full refill
+
+    # 10 tokens refill in ~0.1s
+    await asyncio.wait_for(budget.acquire(10, PRIORITY_HIGH), timeout=1)
+
+    assert not bulk.done()
+    bulk.cancel()
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+def test_errors_are_classified_and_retry_after_is_read():
+    """Status codes map to error kinds and Retry-After is honoured."""
+    assert classify_error(_HTTPError(429)) == llm_service.RATE_LIMIT
+    assert classify_error(_HTTPError(503)) == llm_service.SERVER_ERROR
+    assert classify_error(_HTTPError(401)) == llm_service.FATAL
+    assert classify_error(TimeoutError()) == llm_service.TIMEOUT
+    assert (
+        classify_error(ValueError("429 RESOURCE_EXHAUSTED")) == llm_service.RATE_LIMIT
+    )
+    with pytest.raises(ValidationError) as invalid:
+        _Answer.model_validate({"ok": "maybe"})
+    assert classify_error(invalid.value) == llm_service.PARSE_ERROR
+
+    assert retry_after_seconds(_HTTPError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(ValueError("Please retry in 21.5s.")) == 21.5
+    assert retry_after_seconds(_HTTPError(500)) is None
+
+
+async def test_resilient_model_retries_then_falls_back():
+    """Rate limits retry on the same model; bad output is re-asked once, then fails over."""
+    calls = []
+
+    def broken(x):
+        calls.append("primary")
+        raise OutputParserException("bad output")
+
+    def fallback(x):
+        calls.append("fallback")
+        return "ok"
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.0, max_delay=0.0)
+    model = ResilientModel(
+        [("primary", RunnableLambda(broken)), ("fallback", RunnableLambda(fallback))],
+        policy,
+    )
+    assert await model.ainvoke("hi") == "ok"
+    assert calls == ["primary", "primary", "fallback"]
+
+    calls.clear()
+    attempts = iter([_HTTPError(429, {"retry-after": "0"}), _HTTPError(503), None])
+
+    def recovers(x):
+        calls.append("primary")
+        error = next(attempts)
+        if error:
+            raise error
+        return "recovered"
+
+    model = ResilientModel([("primary", RunnableLambda(recovers))], policy)
+    assert model.invoke("hi") == "recovered"
+    assert calls == ["primary"] * 3
+
+
+async def test_retry_after_beyond_max_delay_moves_to_the_next_model():
+    """Retry-After is a lower bound: if it is too long, fail over instead of retrying early."""
+    policy = RetryPolicy(max_attempts=3, base_delay=0.0, max_delay=5.0)
+    assert policy.delay(1, _HTTPError(429, {"retry-after": "3"})) == 3.0
+    assert policy.delay(1, _HTTPError(429, {"retry-after": "30"})) is None
+
+    calls = []
+
+    def limited(x):
+        calls.append("primary")
+        raise _HTTPError(429, {"retry-after": "30"})
+
+    def fallback(x):
+        calls.append("fallback")
+        return "ok"
+
+    model = ResilientModel(
+        [("primary", RunnableLambda(limited)), ("fallback", RunnableLambda(fallback))],
+        policy,
+    )
+    assert await model.ainvoke("hi") == "ok"
+    assert calls == ["primary", "fallback"]
+
+
+class _Events(BaseModel):
+    events: list[str]
+
+
+def test_cascade_and_chunk_model_are_configurable():
+    """Cascades and the chunk model are read from the configuration."""
+    configurable = Configuration(
+        llm_model="openai:gpt-4o",
+        llm_cascades="extraction=openai:gpt-4o-mini>openai:gpt-4o, report=openai:gpt-4o",
+    )
+    assert configurable.get_llm_cascade("extraction") == [
+        "openai:gpt-4o-mini",
+        "openai:gpt-4o",
+    ]
+    assert configurable.get_llm_cascade("report") == ["openai:gpt-4o"]
+    assert configurable.get_llm_cascade("classification") == []
+    assert configurable.get_llm_chunk_model() == "openai:gpt-4o"
+    assert (
+        Configuration(chunk_llm_model="openai:gpt-4o-mini").get_llm_chunk_model()
+        == "openai:gpt-4o-mini"
+    )
+
+    # Without a cascade the task gets the plain (cached) model
+    assert create_llm_cascade_model("extraction", {}, _Answer) is (
+        create_llm_structured_model({}, class_name=_Answer)
+    )
+    config = {"configurable": {"llm_cascades": "extraction=a:small>b:large"}}
+    cascade = create_llm_cascade_model("extraction", config, _Answer)
+    assert [name for name, _ in cascade.stages] == ["a:small", "b:large"]
+
+
+async def test_cascade_escalates_only_when_the_check_fails():
+    """The larger model is only called when the smaller one's output fails the check."""
+    calls = []
+
+    def stage(name, answer):
+        def run(x):
+            calls.append(name)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        return (name, RunnableLambda(run))
+
+    def check(output):
+        return default_output_check(output) and bool(output.events)
+
+    cascade = CascadeModel(
+        "test", [stage("small", _Events(events=["a"])), stage("large", None)], check
+    )
+    assert (await cascade.ainvoke("hi")).events == ["a"]
+    assert calls == ["small"]
+
+    calls.clear()
+    strong = _Events(events=["b"])
+    for first in (_Events(events=[]), ValueError("bad output")):
+        cascade = CascadeModel(
+            "test", [stage("small", first), stage("large", strong)], check
+        )
+        assert cascade.invoke("hi") is strong
+    assert calls == ["small", "large", "small", "large"]
+
+
+async def test_valid_empty_extraction_does_not_escalate():
+    """A chunk with no evidence is answered once; incomplete events escalate."""
+    calls = []
+
+    def stage(name, answer):
+        def run(x):
+            calls.append(name)
+            return answer
+
+        return (name, RunnableLambda(run))
+
+    empty = RawEventList(events=[])
+    strong = RawEventList(events=[RawEvent(description="found", category="science")])
+    cascade = CascadeModel(
+        "extraction",
+        [stage("small", empty), stage("large", strong)],
+        has_complete_events,
+    )
+    assert await cascade.ainvoke("chunk") is empty
+    assert calls == ["small"]
+
+    incomplete = RawEventList(events=[RawEvent(description="", category="science")])
+    cascade = CascadeModel(
+        "extraction",
+        [stage("small", incomplete), stage("large", strong)],
+        has_complete_events,
+    )
+    assert await cascade.ainvoke("chunk") is strong
+    assert calls == ["small", "small", "large"]
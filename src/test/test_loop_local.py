@@ -0,0 +1,29 @@
+"""Tests for the per-event-loop object registry."""
+
+import asyncio
+
+from src.loop_local import LoopLocalRegistry
+
+
+def test_registry_keeps_one_object_per_key_and_loop():
+    """Keys share an object within a loop; a new loop rebuilds and discards."""
+    discarded = []
+    registry = LoopLocalRegistry(lambda obj, loop: discarded.append((obj, loop)))
+
+    async def lookup():
+        first = registry.get(("strict",), object)
+        assert registry.get(("strict",), object) is first
+        assert registry.get(("loose",), object) is not first
+        return first, asyncio.get_running_loop()
+
+    old_loop, new_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        old, old_running = old_loop.run_until_complete(lookup())
+        new, _ = new_loop.run_until_complete(lookup())
+    finally:
+        old_loop.close()
+        new_loop.close()
+
+    assert new is not old
+    assert len(discarded) == 2 and (old, old_running) in discarded
+    assert len(registry.clear()) == 2 and registry.clear() == []
@@ -0,0 +1,27 @@
+"""Tests for BM25 chunk relevance ranking."""
+
+from src.services.relevance_service import RelevanceService
+
+
+def test_bm25_ranks_chunks_about_the_claim_first():
+    """Chunks dense in rare claim terms outrank boilerplate and generic text."""
+    chunks = [
+        "Subscribe to our newsletter for the latest health news and offers.",
+        "Children love birthday parties, cake and games with friends.",
+        "Double-blind trials found sugar does not cause hyperactivity in children. "
+        "Sugar intake and hyperactivity scores were unrelated.",
+        "A review of diet and behaviour in children.",
+    ]
+
+    scores = RelevanceService.bm25_scores(
+        "Does sugar cause hyperactivity in children?", chunks
+    )
+
+    assert RelevanceService.top_k(scores, 2) == [2, 3]
+    assert scores[0] == 0.0
+
+
+def test_top_k_skips_non_matching_and_keeps_order_on_ties():
+    """Zero scores are never selected; equal scores keep input order."""
+    assert RelevanceService.top_k([0.0, 1.5, 1.5, 0.2, 0.0], 3) == [1, 2, 3]
+    assert RelevanceService.top_k([0.0, 0.0], 5) == []
@@ -0,0 +1,306 @@
+"""Tests for the search and batch-processing nodes of the research graph."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from src.research_events import research_events_graph
+from src.research_events.research_events_graph import SearchResultCache
+from src.state import RawEvent
+from src.url_crawler import utils
+
+ARTICLE = " ".join(
+    f"Trial {i} enrolled {40 + i} children and found no change in behavior "
+    f"after sugar compared with placebo (p = 0.{i % 9 + 1})."
+    for i in range(150)
+)
+
+
+class _CharEncoding:
+    """One token per character."""
+
+    def encode(self, text):
+        return [ord(c) for c in text]
+
+    def encode_batch(self, texts):
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens):
+        return "".join(chr(t) for t in tokens)
+
+
+@pytest.fixture(autouse=True)
+def char_encoding(monkeypatch):
+    """Tokenize one character per token instead of loading tiktoken."""
+    monkeypatch.setattr(utils, "_tokenizer", _CharEncoding())
+
+
+def _batch_state(pages, fingerprints=None):
+    return {
+        "research_question": "sugar makes children hyperactive",
+        "target_urls": list(pages),
+        "scraped_pages": dict(pages),
+        "source_scores": {url: 0.5 for url in pages},
+        "page_fingerprints": fingerprints or {},
+    }
+
+
+def _extraction(fail_urls=()):
+    async def extract(chunks, url, claim, config):
+        if url in fail_urls:
+            raise RuntimeError("model down")
+        return [RawEvent(description=f"from {url}", category="science")]
+
+    return patch.object(
+        research_events_graph.EventService,
+        "run_batch_extraction",
+        AsyncMock(side_effect=extract),
+    )
+
+
+async def test_replayed_claim_is_not_a_duplicate_of_itself():
+    """Running the same claim again, with the same pages, still extracts them."""
+    pages = {"https://a.com/x": ARTICLE}
+    with _extraction() as extract:
+        first = await research_events_graph.process_batch_node(_batch_state(pages), {})
+        second = await research_events_graph.process_batch_node(_batch_state(pages), {})
+        # Even with the first run's fingerprints, a page never matches itself
+        third = await research_events_graph.process_batch_node(
+            _batch_state(pages, first.update["page_fingerprints"]), {}
+        )
+
+    assert extract.await_count == 3
+    for result in (first, second, third):
+        assert len(result.update["gathered_events"]) == 1
+
+
+async def test_copies_are_skipped_and_only_extracted_pages_remembered():
+    """The better source wins; a page whose extraction failed is not remembered."""
+    pages = {
+        "https://a.com/x": ARTICLE,
+        "https://b.com/copy": "Reuters - " + ARTICLE,
+        "https://c.com/other": " ".join(
+            f"Survey {i}: parents of {90 + i} children believe sugar makes "
+            f"children hyperactive at parties in year {1990 + i}."
+            for i in range(150)
+        ),
+    }
+    state = _batch_state(pages)
+    state["source_scores"]["https://b.com/copy"] = 0.4
+
+    with _extraction(fail_urls={"https://c.com/other"}) as extract:
+        result = await research_events_graph.process_batch_node(state, {})
+
+    extracted = [call.args[1] for call in extract.await_args_list]
+    assert "https://b.com/copy" not in extracted
+    assert "https://c.com/other" in extracted
+    assert set(result.update["page_fingerprints"]) == {"https://a.com/x"}
+
+
+class _Backend:
+    """Fake search backend: the same results for every query."""
+
+    name = "fake"
+
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    async def search(self, query, max_results, include_raw_content):
+        self.queries.append(query)
+        return self.results
+
+
+def _search(backend, **configurable):
+    config = {"configurable": {"bypass_search_cache": True, **configurable}}
+    return (
+        patch.object(research_events_graph, "get_search_backend", return_value=backend),
+        config,
+    )
+
+
+async def test_search_scrapes_only_the_best_sources():
+    """Sources are ranked and capped before any scrape starts."""
+    backend = _Backend(
+        [
+            {"url": "https://www.nature.com/articles/sugar", "score": 0.9},
+            {"url": "https://nih.gov/study", "score": 0.8},
+            {"url": "https://example.com/page", "score": 0.5},
+            {"url": "https://medium.com/post", "score": 0.4},
+        ]
+    )
+    patch_backend, config = _search(
+        backend, max_sources_per_call=2, use_search_raw_content=False
+    )
+    crawl = AsyncMock(return_value="page text")
+
+    with patch_backend, patch.object(research_events_graph, "url_crawl", crawl):
+        result = await research_events_graph.search_node(
+            {"research_question": "sugar"}, config
+        )
+
+    kept = ["https://www.nature.com/articles/sugar", "https://nih.gov/study"]
+    assert result.update["target_urls"] == kept
+    assert [call.args[0] for call in crawl.await_args_list] == kept
+    assert set(result.update["source_scores"]) == set(kept)
+
+
+async def test_search_queries_overlap_and_results_are_cleaned_as_they_arrive():
+    """Queries run together; one query's page text is cleaned before the others return."""
+    in_flight = 0
+    peak = 0
+    cleaned = asyncio.Event()
+
+    class Staggered(_Backend):
+        async def search(self, query, max_results, include_raw_content):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                if "meta-analysis" in query:
+                    await asyncio.sleep(0)
+                    return [
+                        {
+                            "url": "https://nih.gov/a",
+                            "score": 0.9,
+                            "raw_content": ARTICLE,
+                        }
+                    ]
+                # Only returns once the first query's result has been cleaned
+                await asyncio.wait_for(cleaned.wait(), timeout=2)
+                return []
+            finally:
+                in_flight -= 1
+
+    async def clean(configurable, func, raw):
+        cleaned.set()
+        return func(raw)
+
+    patch_backend, config = _search(Staggered([]))
+    with (
+        patch_backend,
+        patch.object(research_events_graph, "run_cpu_bound", clean),
+        patch.object(research_events_graph, "url_crawl", AsyncMock()) as crawl,
+    ):
+        result = await research_events_graph.search_node(
+            {"research_question": "sugar"}, config
+        )
+
+    assert peak == 3
+    assert result.update["target_urls"] == ["https://nih.gov/a"]
+    crawl.assert_not_awaited()
+
+
+def test_search_cache_expires_entries_after_ttl(monkeypatch):
+    """An entry older than the TTL is a miss and is dropped."""
+    now = [100.0]
+    monkeypatch.setattr(research_events_graph.time, "monotonic", lambda: now[0])
+    cache = SearchResultCache(ttl_seconds=60, max_entries=10, max_content_length=100)
+    key = SearchResultCache.make_key("sugar", max_results=3)
+
+    cache.set(key, [{"url": "https://a.com"}])
+    now[0] += 30
+    assert cache.get(key) == [{"url": "https://a.com"}]
+    now[0] += 31
+    assert cache.get(key) is None
+    assert cache.stats == {"hits": 1, "misses": 1, "expired": 1, "evictions": 0}
+
+
+def test_search_cache_evicts_least_recently_used():
+    """Over the size cap, the entry read least recently goes first."""
+    cache = SearchResultCache(ttl_seconds=60, max_entries=2, max_content_length=100)
+    a, b, c = ({"url": f"https://{name}.com"} for name in "abc")
+    cache.set(("a",), [a])
+    cache.set(("b",), [b])
+    cache.get(("a",))
+    cache.set(("c",), [c])
+
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == [a] and cache.get(("c",)) == [c]
+    assert cache.stats["evictions"] == 1
+
+
+def test_search_cache_keeps_only_usable_page_text():
+    """Raw content past the content limit is not held in memory."""
+    cache = SearchResultCache(ttl_seconds=60, max_entries=2, max_content_length=5)
+    result = {"url": "https://a.com", "raw_content": "0123456789"}
+    cache.set(("a",), [result])
+
+    assert cache.get(("a",)) == [{"url": "https://a.com", "raw_content": "01234"}]
+    assert result["raw_content"] == "0123456789"
+
+
+def test_search_cache_key_normalizes_query():
+    """Case, punctuation and spacing do not change the key; params do."""
+    key = SearchResultCache.make_key("Sugar  makes kids HYPER?", max_results=3)
+
+    assert key == SearchResultCache.make_key("sugar makes kids hyper", max_results=3)
+    assert key != SearchResultCache.make_key("sugar makes kids hyper", max_results=5)
+
+
+async def test_long_search_content_skips_the_scraper():
+    """Raw content over the threshold is used; short or missing content is scraped."""
+    backend = _Backend(
+        [
+            {"url": "https://nih.gov/long", "score": 0.9, "raw_content": ARTICLE},
+            {"url": "https://nih.gov/short", "score": 0.8, "raw_content": "Too short."},
+            {"url": "https://nih.gov/none", "score": 0.7},
+        ]
+    )
+    patch_backend, config = _search(backend, min_raw_content_length=1000)
+    crawl = AsyncMock(return_value="scraped text")
+
+    with patch_backend, patch.object(research_events_graph, "url_crawl", crawl):
+        result = await research_events_graph.search_node(
+            {"research_question": "sugar"}, config
+        )
+
+    pages = result.update["scraped_pages"]
+    assert sorted(call.args[0] for call in crawl.await_args_list) == [
+        "https://nih.gov/none",
+        "https://nih.gov/short",
+    ]
+    assert pages["https://nih.gov/long"].startswith("Trial 0 enrolled")
+    assert (
+        pages["https://nih.gov/short"]
+        == pages["https://nih.gov/none"]
+        == "scraped text"
+    )
+
+
+async def test_scraping_starts_before_slow_queries_and_displaced_sources_stop():
+    """A leading source is scraped at once and cancelled when a better one arrives."""
+    started = asyncio.Event()
+    cancelled = []
+
+    class Staggered(_Backend):
+        async def search(self, query, max_results, include_raw_content):
+            if "meta-analysis" in query:
+                return [{"url": "https://example.com/page", "score": 0.5}]
+            # Returns only once the first query's source is being scraped
+            await asyncio.wait_for(started.wait(), timeout=2)
+            if "debunked" in query:
+                return [{"url": "https://nih.gov/study", "score": 0.9}]
+            return []
+
+    async def crawl(url, config):
+        if url == "https://example.com/page":
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+        return "page text"
+
+    patch_backend, config = _search(
+        Staggered([]), max_sources_per_call=1, use_search_raw_content=False
+    )
+    with patch_backend, patch.object(research_events_graph, "url_crawl", crawl):
+        result = await research_events_graph.search_node(
+            {"research_question": "sugar"}, config
+        )
+
+    assert result.update["target_urls"] == ["https://nih.gov/study"]
+    assert result.update["scraped_pages"] == {"https://nih.gov/study": "page text"}
+    assert cancelled == ["https://example.com/page"]
@@ -0,0 +1,68 @@
+"""Tests for the on-disk scrape cache."""
+
+import pytest
+from src import sqlite_cache
+from src.url_crawler.scrape_cache import ScrapeCache
+
+
+@pytest.fixture
+def cache(tmp_path) -> ScrapeCache:
+    """Provide a small cache backed by a temporary database."""
+    cache = ScrapeCache(
+        path=str(tmp_path / "scrape_cache.sqlite"), ttl_seconds=60, max_bytes=100
+    )
+    yield cache
+    cache.close()
+
+
+def test_cache_hit_and_miss(cache: ScrapeCache):
+    """Stored content is returned for the same canonical URL."""
+    assert cache.get("https://example.com/page") is None
+
+    cache.set("https://Example.com/page/#intro", "Page content")
+
+    assert cache.get("https://example.com/page") == "Page content"
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_cache_entries_expire(cache: ScrapeCache, monkeypatch):
+    """Entries older than the TTL are treated as misses."""
+    now = 1_000_000.0
+    monkeypatch.setattr(sqlite_cache.time, "time", lambda: now)
+    cache.set("https://example.com/old", "Old content")
+
+    now += 61
+    assert cache.get("https://example.com/old") is None
+    assert cache.stats["expired"] == 1
+
+
+def test_cache_evicts_least_recently_used(cache: ScrapeCache, monkeypatch):
+    """The least recently read entry is evicted when over the size cap."""
+    now = 1_000_000.0
+
+    def fake_time():
+        return now
+
+    monkeypatch.setattr(sqlite_cache.time, "time", fake_time)
+
+    cache.set("https://example.com/a", "a" * 40)
+    now += 1
+    cache.set("https://example.com/b", "b" * 40)
+    now += 1
+    cache.get("https://example.com/a")
+    now += 1
+    cache.set("https://example.com/c", "c" * 40)
+
+    assert cache.get("https://example.com/b") is None
+    assert cache.get("https://example.com/a") == "a" * 40
+    assert cache.get("https://example.com/c") == "c" * 40
+    assert cache.stats["evictions"] == 1
+
+
+def test_cache_is_keyed_by_length_limit(cache: ScrapeCache):
+    """Content truncated under a smaller limit is not served for a larger one."""
+    cache.set("https://example.com/long", "a" * 10, max_chars=10)
+
+    assert cache.get("https://example.com/long", max_chars=10) == "a" * 10
+    assert cache.get("https://example.com/long", max_chars=20) is None
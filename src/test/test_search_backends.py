@@ -0,0 +1,98 @@
+"""Tests for the local corpus search backend."""
+
+import os
+
+import pytest
+from src.research_events.search_backends import LocalCorpusSearchBackend
+from src.url_crawler.utils import scrape_page_content
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Write a tiny corpus of markdown, text and HTML documents."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "sugar.md").write_text(
+        "# Sugar and hyperactivity\n\nA meta-analysis of 16 trials found sugar "
+        "does not cause hyperactivity in children."
+    )
+    (docs / "wall.txt").write_text(
+        "The Great Wall of China is not visible from orbit with the naked eye."
+    )
+    (docs / "goldfish.html").write_text(
+        "<html><body><nav>Menu</nav><main><h1>Goldfish memory</h1>"
+        "<p>Goldfish remember things for months, not three seconds.</p>"
+        "</main></body></html>"
+    )
+    (docs / "image.png").write_bytes(b"\x89PNG")
+    return docs
+
+
+@pytest.fixture
+def backend(corpus, tmp_path) -> LocalCorpusSearchBackend:
+    """Provide a backend indexing the corpus into a temporary database."""
+    return LocalCorpusSearchBackend(
+        corpus_dir=str(corpus), index_path=str(tmp_path / "index.sqlite")
+    )
+
+
+@pytest.mark.asyncio
+async def test_local_search_ranks_matching_documents(backend, corpus):
+    """The most relevant document comes first with file URLs and raw content."""
+    results = await backend.search(
+        "does sugar cause hyperactivity?", max_results=3, include_raw_content=True
+    )
+
+    assert results[0]["url"] == (corpus / "sugar.md").resolve().as_uri()
+    assert results[0]["title"] == "Sugar and hyperactivity"
+    assert 0 < results[0]["score"] < 1
+    assert "16 trials" in results[0]["raw_content"]
+
+
+@pytest.mark.asyncio
+async def test_local_search_indexes_html_main_content(backend):
+    """HTML is converted before indexing, dropping navigation."""
+    results = await backend.search("goldfish", max_results=3, include_raw_content=False)
+
+    assert len(results) == 1
+    assert results[0]["title"] == "Goldfish memory"
+    assert "raw_content" not in results[0]
+    assert (
+        await backend.search("menu", max_results=3, include_raw_content=False)
+    ) == []
+
+
+def test_refresh_index_is_incremental(backend, corpus):
+    """Only new or changed files are re-indexed and deleted files are dropped."""
+    assert backend.refresh_index() == 3
+    assert backend.refresh_index() == 0
+
+    (corpus / "wall.txt").write_text(
+        "The Great Wall is visible from low orbit in photos."
+    )
+    os.utime(corpus / "wall.txt", (1, 1))
+    (corpus / "sugar.md").unlink()
+
+    assert backend.refresh_index() == 1
+    rows = backend._conn.execute("SELECT count(*) FROM documents").fetchone()
+    assert rows[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_file_urls_are_only_read_inside_the_corpus(corpus, tmp_path):
+    """Corpus documents are readable; other local files are refused."""
+    secret = tmp_path / "secret.txt"
+    secret.write_text("api_key=do-not-leak")
+    config = {"configurable": {"search_corpus_dir": str(corpus)}}
+
+    text = await scrape_page_content((corpus / "wall.txt").as_uri(), config)
+    assert text.startswith("The Great Wall")
+
+    for url in (
+        secret.as_uri(),
+        (corpus / ".." / "secret.txt").as_uri(),
+        "file:///etc/passwd",
+    ):
+        assert await scrape_page_content(url, config) is None
+    # Without a corpus no local file is read at all
+    assert await scrape_page_content((corpus / "wall.txt").as_uri(), {}) is None
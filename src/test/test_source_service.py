@@ -0,0 +1,32 @@
+"""Tests for source quality scoring and selection."""
+
+from src.services.source_service import DEFAULT_TIER, SourceService
+
+
+def test_domain_tier_matches_parent_domains_and_suffixes():
+    """Subdomains inherit their domain's tier; institutional suffixes score high."""
+    assert SourceService.domain_tier("https://pubmed.ncbi.nlm.nih.gov/123") == 0.95
+    assert SourceService.domain_tier("https://www.reddit.com/r/science") == 0.15
+    assert SourceService.domain_tier("https://health.state.gov.au/page") == 0.9
+    assert SourceService.domain_tier("https://psych.stanford.edu/lab") == 0.85
+    assert SourceService.domain_tier("https://some-blog.example/post") == DEFAULT_TIER
+
+
+def test_url_patterns_adjust_the_score():
+    """Study-like paths score higher and listicles lower than the bare domain."""
+    base = SourceService.score_source("https://example.com/page")
+    study = SourceService.score_source("https://example.com/article/sugar-study")
+    listicle = SourceService.score_source("https://example.com/top-10-sugar-myths")
+
+    assert study > base > listicle
+    assert SourceService.score_source("https://nature.com/x", 1.0) == 0.9
+    assert SourceService.score_source("https://nature.com/x", 5.0) == 0.9
+
+
+def test_top_sources_orders_by_score_and_truncates():
+    """The best sources come first and at most `budget` are returned."""
+    scores = {"a": 0.3, "b": 0.9, "c": 0.0, "d": 0.6}
+
+    assert SourceService.top_sources(scores, 3) == ["b", "d", "a"]
+    assert SourceService.top_sources(scores, 10) == ["b", "d", "a", "c"]
+    assert SourceService.top_sources(scores, 0) == []
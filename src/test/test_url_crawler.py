@@ -2,7 +2,7 @@
 
 """Tests for the url_krawler_graph."""
 
-from unittest.mock import AsyncMock, patch
+from unittest.mock import ANY, AsyncMock, patch
 
 import pytest
 
@@ -60,7 +60,7 @@ async def test_url_crawler_with_mocked_llm(
     assert raw_scraped_content == mock_scraped_content
 
     # Verify that url_crawl was called with the correct URL
-    mock_crawl.assert_called_once_with(sample_input_state["url"])
+    mock_crawl.assert_called_once_with(sample_input_state["url"], ANY)
 
 
 @pytest.mark.asyncio
@@ -88,7 +88,7 @@ async def test_url_crawler_with_mocked_url_crawling(
     assert raw_scraped_content == mock_scraped_content
 
     # Verify that url_crawl was called with the correct URL
-    mock_crawl.assert_called_once_with(sample_input_state["url"])
+    mock_crawl.assert_called_once_with(sample_input_state["url"], ANY)
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,41 @@
+"""Tests for URL canonicalization."""
+
+import pytest
+from src.services.url_service import URLService
+
+
+@pytest.mark.parametrize(
+    "variant",
+    [
+        "https://example.com/health/sugar-myth",
+        "http://example.com/health/sugar-myth",
+        "https://www.example.com/health/sugar-myth/",
+        "https://EXAMPLE.com:443/health/sugar-myth#section-2",
+        "https://example.com/health/sugar-myth?utm_source=x&utm_medium=y&fbclid=z",
+        "https://m.example.com/health/sugar-myth",
+        "https://amp.example.com/health/sugar-myth",
+        "https://example.com/health/sugar-myth/amp/",
+        "https://example.com/health/sugar-myth?amp=1",
+    ],
+)
+def test_canonicalize_url_variants(variant: str):
+    """Tracking, fragment, www, AMP and mobile variants map to one URL."""
+    assert (
+        URLService.canonicalize_url(variant) == "https://example.com/health/sugar-myth"
+    )
+
+
+def test_canonicalize_url_keeps_meaningful_parts():
+    """Content query params, non-default ports and subdomains are kept."""
+    assert (
+        URLService.canonicalize_url("https://en.m.wikipedia.org/wiki/Sugar")
+        == "https://en.wikipedia.org/wiki/Sugar"
+    )
+    assert (
+        URLService.canonicalize_url("https://pubmed.gov/search?term=sugar&page=2")
+        == "https://pubmed.gov/search?page=2&term=sugar"
+    )
+    assert (
+        URLService.canonicalize_url("http://localhost:8080/doc")
+        == "https://localhost:8080/doc"
+    )
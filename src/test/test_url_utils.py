@@ -0,0 +1,428 @@
+"""Tests for the url_crawler scraping and text utilities."""
+
+import asyncio
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.url_crawler import scrapers, utils
+from src.url_crawler.chunking import structure_chunks
+from src.url_crawler.fingerprint import DuplicateDetector, simhash
+from src.url_crawler.http_client import close_http_session, get_http_session
+from src.url_crawler.scrapers import (
+    SCRAPER_BACKENDS,
+    DirectScraper,
+    FirecrawlScraper,
+    HTMLToMarkdown,
+    JsonStringFieldExtractor,
+)
+from src.url_crawler.utils import (
+    chunk_texts_by_tokens,
+    iter_token_chunks,
+    normalize_content,
+    scrape_page_content,
+)
+
+
+def _feed_in_pieces(extractor: JsonStringFieldExtractor, text: str, size: int):
+    """Feed text to the extractor in fixed-size pieces until it is done."""
+    for i in range(0, len(text), size):
+        extractor.feed(text[i : i + size])
+        if extractor.done:
+            break
+
+
+def test_extractor_decodes_escapes_across_piece_boundaries():
+    """Escapes and unicode split between pieces are decoded correctly."""
+    markdown = 'Line "one"\nLine two \\ café 😀 end'
+    body = json.dumps({"success": True, "data": {"markdown": markdown}})
+
+    for size in (1, 2, 3, 7):
+        extractor = JsonStringFieldExtractor("markdown", max_chars=10_000)
+        _feed_in_pieces(extractor, body, size)
+        assert extractor.value == markdown
+        assert not extractor.truncated
+
+
+def test_extractor_stops_at_budget():
+    """Reading stops once the character budget is reached."""
+    body = json.dumps({"data": {"markdown": "x" * 1000, "metadata": {}}})
+
+    extractor = JsonStringFieldExtractor("markdown", max_chars=100)
+    fed = 0
+    for i in range(0, len(body), 16):
+        extractor.feed(body[i : i + 16])
+        fed += 16
+        if extractor.done:
+            break
+
+    assert extractor.value == "x" * 100
+    assert extractor.truncated
+    assert fed < len(body)
+
+
+def test_extractor_missing_field():
+    """A body without the field yields None."""
+    extractor = JsonStringFieldExtractor("markdown", max_chars=100)
+    _feed_in_pieces(extractor, json.dumps({"success": False, "error": "nope"}), 5)
+    assert extractor.value is None
+
+
+ARTICLE_HTML = """
+<html>
+  <head><title>Test page</title><script>var tracking = 1;</script></head>
+  <body>
+    <nav><a href="/">Home</a> <a href="/about">About</a></nav>
+    <main>
+      <h1>Sleep and memory</h1>
+      <p>A 2019 meta-analysis of <b>42 studies</b> found a clear effect.</p>
+      <ul><li>Sample size: 3,100</li><li>p &lt; 0.01</li></ul>
+    </main>
+    <footer>Copyright 2024</footer>
+  </body>
+</html>
+"""
+
+
+@pytest.fixture
+async def local_server(monkeypatch):
+    """Serve a static article and a failing fake Firecrawl endpoint."""
+    monkeypatch.setattr(SCRAPER_BACKENDS["direct"], "allow_private_hosts", True)
+
+    async def article(request):
+        return web.Response(text=ARTICLE_HTML, content_type="text/html")
+
+    async def redirect(request):
+        raise web.HTTPFound("/metadata")
+
+    async def broken_firecrawl(request):
+        return web.Response(status=500)
+
+    app = web.Application()
+    app.router.add_get("/article", article)
+    app.router.add_get("/redirect", redirect)
+    app.router.add_get("/metadata", article)
+    app.router.add_post("/v0/scrape", broken_firecrawl)
+
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+    await close_http_session()
+
+
+def test_html_to_markdown_keeps_main_content():
+    """Page chrome is dropped and structure is converted to markdown."""
+    parser = HTMLToMarkdown()
+    parser.feed(ARTICLE_HTML)
+    parser.close()
+    markdown = parser.markdown()
+
+    assert markdown.startswith("# Sleep and memory")
+    assert "A 2019 meta-analysis of 42 studies found a clear effect." in markdown
+    assert "- Sample size: 3,100" in markdown
+    assert "- p < 0.01" in markdown
+    assert "Home" not in markdown
+    assert "Copyright" not in markdown
+    assert "tracking" not in markdown
+
+
+@pytest.mark.asyncio
+async def test_direct_backend_scrapes_local_server(local_server):
+    """The direct backend fetches and converts a page without Firecrawl."""
+    config = {"configurable": {"scraper_backends": "direct"}}
+
+    content = await scrape_page_content(
+        str(local_server.make_url("/article")), config, max_chars=30
+    )
+
+    assert content == "# Sleep and memory\n\nA 2019 met"
+
+
+@pytest.mark.asyncio
+async def test_falls_back_when_firecrawl_fails(local_server, monkeypatch):
+    """A failing backend is skipped in favour of the next one."""
+    monkeypatch.setattr(
+        SCRAPER_BACKENDS["firecrawl"],
+        "api_url",
+        str(local_server.make_url("/v0/scrape")),
+    )
+    config = {"configurable": {"scraper_backends": "firecrawl,direct"}}
+
+    content = await scrape_page_content(str(local_server.make_url("/article")), config)
+
+    assert content.startswith("# Sleep and memory")
+
+
+@pytest.mark.asyncio
+async def test_firecrawl_reads_markdown_not_content():
+    """A real-shaped Firecrawl response yields the markdown field, not content."""
+    body = {
+        "success": True,
+        "data": {
+            "content": 'Plain text: the API returns "markdown": "too" ' * 500,
+            "markdown": "# Sugar and behaviour\n\nA **1995 meta-analysis** found no effect.",
+            "metadata": {
+                "title": "Sugar and behaviour",
+                "sourceURL": "https://example.com/sugar",
+                "pageStatusCode": 200,
+            },
+        },
+    }
+
+    async def firecrawl(request):
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_post("/v0/scrape", firecrawl)
+    server = TestServer(app)
+    await server.start_server()
+    scraper = FirecrawlScraper(str(server.make_url("")).rstrip("/"))
+    try:
+        async with aiohttp.ClientSession() as session:
+            markdown = await scraper.scrape(
+                "https://example.com/sugar", session, max_chars=1000
+            )
+    finally:
+        await server.close()
+
+    assert markdown == body["data"]["markdown"]
+
+
+@pytest.mark.asyncio
+async def test_direct_backend_refuses_private_hosts():
+    """Loopback and link-local hosts are not fetched by default."""
+    scraper = DirectScraper()
+    async with aiohttp.ClientSession() as session:
+        for url in ("http://127.0.0.1:9/", "http://169.254.169.254/latest/meta-data"):
+            with pytest.raises(PermissionError):
+                await scraper.scrape(url, session, max_chars=100)
+
+
+@pytest.mark.asyncio
+async def test_direct_backend_checks_every_redirect(local_server, monkeypatch):
+    """A redirect to a refused address is not followed."""
+    checked = []
+
+    async def check(url):
+        checked.append(url)
+        if url.endswith("/metadata"):
+            raise PermissionError(url)
+
+    monkeypatch.setattr(scrapers, "check_public_host", check)
+    scraper = DirectScraper()
+    async with aiohttp.ClientSession() as session:
+        with pytest.raises(PermissionError):
+            await scraper.scrape(
+                str(local_server.make_url("/redirect")), session, max_chars=100
+            )
+
+    assert [url.rsplit("/", 1)[1] for url in checked] == ["redirect", "metadata"]
+
+
+def test_session_from_a_previous_loop_is_closed():
+    """A new event loop gets a new session and the old loop's one is closed."""
+    first = asyncio.run(get_http_session())
+    second = asyncio.run(get_http_session())
+
+    assert second is not first
+    assert first.closed and not second.closed
+    asyncio.run(close_http_session())
+    assert second.closed
+
+
+SCRAPED_MARKDOWN = """
+[Skip to content](#main)
+
+* [Home](/)
+* [News](/news)
+* [Health](/health)
+
+# Does sugar make kids hyper?
+
+![hero image](https://img.example.com/a.png)
+
+A **1995 meta-analysis** of [16 trials](https://doi.org/10.1001/x)   found no effect.
+
+We use cookies to improve your experience. Accept all
+
+## Results
+
+Children given sugar   behaved the same as the placebo group.
+
+## References
+
+1. [Wolraich ML](https://pubmed.gov/1) et al. JAMA 1995.
+2. Smith J. Sugar and behaviour in children. Pediatrics, 1994.
+
+## Discussion
+
+The myth persists because of expectation effects.
+
+© 2024 Example Media. All rights reserved.
+"""
+
+
+def test_normalize_content_strips_markup_and_boilerplate():
+    """Links, images, menus, banners and reference lists are removed."""
+    text, removed = normalize_content(SCRAPED_MARKDOWN)
+
+    assert text == (
+        "# Does sugar make kids hyper?\n"
+        "\n"
+        "A 1995 meta-analysis of 16 trials found no effect.\n"
+        "\n"
+        "## Results\n"
+        "\n"
+        "Children given sugar behaved the same as the placebo group.\n"
+        "\n"
+        "## Discussion\n"
+        "\n"
+        "The myth persists because of expectation effects."
+    )
+    assert removed == len(SCRAPED_MARKDOWN) - len(text)
+
+
+def test_normalize_content_keeps_short_link_lists():
+    """One or two standalone links are content, not a menu."""
+    text, _ = normalize_content("Sources used:\n[WHO report](https://who.int/r)\n")
+    assert text == "Sources used:\nWHO report"
+
+
+def test_normalize_content_keeps_prose_with_boilerplate_words():
+    """Words like cookie, share or sources in real sentences are not chrome."""
+    page = (
+        "# Do cookies cause acne?\n\n"
+        "A 2019 study found that eating cookies daily did not change acne scores.\n\n"
+        "Patients who share this gene variant had 30% higher risk.\n\n"
+        "Follow us on Twitter\n\n"
+        "## Sources\n\n"
+        "Data came from a national survey of 4,000 teenagers.\n\n"
+        "## Results\n\n"
+        "No link was found.\n\n"
+        "© 2024 Example Media Inc. All rights reserved."
+    )
+
+    text, _ = normalize_content(page)
+
+    assert text == (
+        "# Do cookies cause acne?\n\n"
+        "A 2019 study found that eating cookies daily did not change acne scores.\n\n"
+        "Patients who share this gene variant had 30% higher risk.\n\n"
+        "## Sources\n\n"
+        "Data came from a national survey of 4,000 teenagers.\n\n"
+        "## Results\n\n"
+        "No link was found."
+    )
+
+
+def test_near_duplicate_pages_are_detected():
+    """Syndicated copies match; unrelated pages and the same page do not."""
+    article = " ".join(
+        f"Trial {i} enrolled {40 + i} children and found no change in behavior "
+        f"after sugar compared with placebo (p = 0.{i % 9 + 1})."
+        for i in range(150)
+    )
+    syndicated = "Reuters - " + article + " Reporting by the health desk."
+    unrelated = " ".join(
+        f"Astronaut {i} reported that the Great Wall was not visible from orbit "
+        f"on mission {i * 3}."
+        for i in range(150)
+    )
+
+    detector = DuplicateDetector(max_distance=3)
+    assert detector.find_duplicate(simhash(article), "https://a.com/x") is None
+    detector.add("https://a.com/x", simhash(article))
+    assert detector.find_duplicate(simhash(syndicated), "https://b.com/y") == (
+        "https://a.com/x"
+    )
+    assert detector.find_duplicate(simhash(unrelated), "https://c.com/z") is None
+    # A page is never a duplicate of itself, whatever form its URL takes
+    assert detector.find_duplicate(simhash(article), "https://www.a.com/x") is None
+
+
+class _CharEncoding:
+    """One token per character; records how much text was encoded."""
+
+    def __init__(self):
+        self.encoded_chars = 0
+
+    def encode(self, text):
+        self.encoded_chars += len(text)
+        return [ord(c) for c in text]
+
+    def encode_batch(self, texts):
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens):
+        return "".join(chr(t) for t in tokens)
+
+
+@pytest.fixture
+def char_encoding(monkeypatch) -> _CharEncoding:
+    """Tokenize one character per token instead of loading tiktoken."""
+    encoding = _CharEncoding()
+    monkeypatch.setattr(utils, "_tokenizer", encoding)
+    return encoding
+
+
+def test_token_chunker_stops_at_max_chunks(char_encoding):
+    """Only the prefix covering the requested chunks is encoded."""
+    text = "abcdefghij" * 10_000
+    full = list(iter_token_chunks(text, chunk_size=100, overlap_size=10))
+    char_encoding.encoded_chars = 0
+
+    chunks = list(
+        iter_token_chunks(text, chunk_size=100, overlap_size=10, max_chunks=4)
+    )
+
+    assert chunks == full[:4]
+    assert char_encoding.encoded_chars < len(text) // 10
+
+
+async def test_batch_chunker_matches_single_documents(char_encoding):
+    """Batch chunking gives the same chunks as chunking each text alone."""
+    texts = ["short text", "x" * 5000, "", "word " * 2000]
+
+    batched = await chunk_texts_by_tokens(
+        texts, chunk_size=300, overlap_size=20, max_chunks=3
+    )
+
+    assert batched == [
+        list(iter_token_chunks(text, chunk_size=300, overlap_size=20, max_chunks=3))
+        for text in texts
+    ]
+    assert [len(chunks) for chunks in batched] == [1, 3, 0, 3]
+
+
+def test_structure_chunks_keep_sections_and_sentences_whole(char_encoding):
+    """Chunks end at line or sentence boundaries and never on a heading."""
+    intro = "Sugar does not cause hyperactivity in children. " * 3
+    table = "| study | n | effect |\n| Wolraich 1995 | 23 | none |\n"
+    long_paragraph = "A meta-analysis pooled 16 trials. " * 20
+    text = f"# Summary\n{intro.strip()}\n{table}## Evidence\n{long_paragraph.strip()}\n"
+
+    chunks = structure_chunks(text, max_tokens=300)
+
+    assert all(chunk.tokens <= 300 for chunk in chunks)
+    pieces = [chunk.text(text) for chunk in chunks]
+    assert pieces[0].startswith("# Summary") and table.strip() in pieces[0]
+    assert pieces[1].startswith("## Evidence")
+    for piece in pieces:
+        assert not piece.rstrip().splitlines()[-1].startswith("#")
+        assert piece.rstrip().endswith((".", "|"))
+    # Offsets cover every sentence of the long paragraph exactly once
+    assert "".join(pieces[1:]).count("meta-analysis") == 20
+
+
+def test_structure_chunks_stop_at_max_chunks(char_encoding):
+    """Only the lines needed for the requested chunks are tokenized."""
+    text = "\n".join(f"Paragraph {i} about sugar and behaviour." for i in range(5000))
+
+    chunks = structure_chunks(text, max_tokens=200, max_chunks=2)
+
+    assert len(chunks) == 2
+    assert chunks[0].start == 0 and chunks[1].start > chunks[0].end
+    assert char_encoding.encoded_chars < len(text) // 5
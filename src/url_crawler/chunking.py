@@ -0,0 +1,183 @@
+# src/url_crawler/chunking.py
+"""Structure-aware chunking into token-bounded, offset-tracked records."""
+
+import re
+from itertools import islice
+from typing import Iterator, List, NamedTuple
+
+from langchain_core.runnables import RunnableConfig
+from src.configuration import Configuration
+from src.url_crawler.cpu_executor import run_cpu_bound
+from src.url_crawler.utils import get_tokenizer
+
+
+class TextChunk(NamedTuple):
+    """A chunk as character offsets into its source text, plus its token count."""
+
+    start: int
+    end: int
+    tokens: int
+
+    def text(self, source: str) -> str:
+        """Return the chunk's slice of `source`."""
+        return source[self.start : self.end]
+
+
+class _Piece(NamedTuple):
+    start: int
+    end: int
+    tokens: int
+    heading: bool
+
+
+_LINE = re.compile(r"[^\n]+")
+_HEADING = re.compile(r"#{1,6}\s")
+_TABLE_ROW = re.compile(r"\s*\|")
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+# Lines tokenized per encode_batch call; also how far tokenization runs ahead
+# of the chunks actually kept when max_chunks is set
+_ENCODE_BATCH = 256
+
+
+def _units(text: str) -> Iterator[tuple]:
+    """(start, end, is_heading) of each line, with table rows grouped together.
+
+    After normalize_content every paragraph, list item and heading is one
+    line, so line ends are the natural places to cut. Tables are only cut
+    between rows when they do not fit in a chunk on their own.
+    """
+    table_start = table_end = None
+    for match in _LINE.finditer(text):
+        line = match.group()
+        if not line.strip():
+            continue
+        if _TABLE_ROW.match(line):
+            if table_start is None:
+                table_start = match.start()
+            table_end = match.end()
+            continue
+        if table_start is not None:
+            yield table_start, table_end, False
+            table_start = None
+        yield match.start(), match.end(), bool(_HEADING.match(line))
+    if table_start is not None:
+        yield table_start, table_end, False
+
+
+def _split_long(text: str, start: int, end: int, encoding, max_tokens: int):
+    """Split an over-budget unit at rows or sentences, and hard-cut as a last resort."""
+    segment = text[start:end]
+    if "\n" in segment:
+        spans = [(start + m.start(), start + m.end()) for m in _LINE.finditer(segment)]
+    else:
+        spans, last = [], 0
+        for match in _SENTENCE_END.finditer(segment):
+            spans.append((start + last, start + match.start()))
+            last = match.end()
+        spans.append((start + last, end))
+
+    counts = encoding.encode_batch([text[s:e] for s, e in spans])
+    for (s, e), tokens in zip(spans, counts):
+        if len(tokens) <= max_tokens:
+            yield _Piece(s, e, len(tokens), False)
+            continue
+        # A single sentence longer than the budget: cut it proportionally
+        parts = -(-len(tokens) // max_tokens)
+        step = -(-(e - s) // parts)
+        for cut in range(s, e, step):
+            piece_end = min(cut + step, e)
+            yield _Piece(
+                cut, piece_end, len(encoding.encode(text[cut:piece_end])), False
+            )
+
+
+def _pieces(text: str, encoding, max_tokens: int) -> Iterator[_Piece]:
+    units = _units(text)
+    while True:
+        block = list(islice(units, _ENCODE_BATCH))
+        if not block:
+            return
+        counts = encoding.encode_batch([text[s:e] for s, e, _ in block])
+        for (s, e, heading), tokens in zip(block, counts):
+            if len(tokens) <= max_tokens:
+                yield _Piece(s, e, len(tokens), heading)
+            else:
+                yield from _split_long(text, s, e, encoding, max_tokens)
+
+
+def structure_chunks(
+    text: str, max_tokens: int = 1000, max_chunks: int | None = None
+) -> List[TextChunk]:
+    """Pack headings, paragraphs and sentences into chunks of at most `max_tokens`.
+
+    Chunks end at line (paragraph, list item, table) boundaries and only fall
+    back to sentence boundaries for paragraphs larger than the budget. A new
+    section starts a new chunk once the current one is half full, and a chunk
+    never ends on a heading. Tokenization stops once `max_chunks` are built.
+    """
+    if not text or (max_chunks is not None and max_chunks <= 0):
+        return []
+
+    encoding = get_tokenizer()
+    chunks: List[TextChunk] = []
+    current: List[_Piece] = []
+
+    def size(pieces: List[_Piece]) -> int:
+        # Pieces are joined by a newline, roughly one token each
+        return sum(p.tokens for p in pieces) + max(len(pieces) - 1, 0)
+
+    def emit(pieces: List[_Piece]) -> None:
+        chunks.append(TextChunk(pieces[0].start, pieces[-1].end, size(pieces)))
+
+    def close() -> List[_Piece]:
+        carry = []
+        while current and current[-1].heading:
+            carry.insert(0, current.pop())
+        if current:
+            emit(current)
+        else:
+            emit(carry)
+            carry = []
+        return carry
+
+    for piece in _pieces(text, encoding, max_tokens):
+        if max_chunks is not None and len(chunks) >= max_chunks:
+            break
+        if current:
+            used = size(current)
+            overflow = used + 1 + piece.tokens > max_tokens
+            if overflow or (piece.heading and used >= max_tokens // 2):
+                current = close()
+                if current and size(current) + 1 + piece.tokens > max_tokens:
+                    emit(current)
+                    current = []
+        current.append(piece)
+
+    if current and (max_chunks is None or len(chunks) < max_chunks):
+        emit(current)
+    return chunks[:max_chunks]
+
+
+def structure_chunk_texts(
+    texts: List[str], max_tokens: int = 1000, max_chunks: int | None = None
+) -> List[List[TextChunk]]:
+    """Chunk several documents in one call (the unit of work sent to the CPU executor)."""
+    return [structure_chunks(text, max_tokens, max_chunks) for text in texts]
+
+
+async def chunk_documents(
+    texts: List[str],
+    max_tokens: int = 1000,
+    max_chunks: int | None = None,
+    config: RunnableConfig | None = None,
+) -> List[List[TextChunk]]:
+    """Structure-aware chunk records for many documents, on the CPU executor."""
+    if not texts:
+        return []
+    return await run_cpu_bound(
+        Configuration.from_runnable_config(config),
+        structure_chunk_texts,
+        texts,
+        max_tokens,
+        max_chunks,
+    )
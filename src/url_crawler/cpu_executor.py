@@ -0,0 +1,211 @@
+# src/url_crawler/cpu_executor.py
+"""Process-wide pool for CPU-bound text work, with event-loop lag monitoring."""
+
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Tuple
+
+from src.configuration import Configuration
+from src.loop_local import LoopLocalRegistry
+
+# How often the loop-lag monitor wakes up
+LAG_SAMPLE_INTERVAL = 0.1
+LAG_WINDOW = 600
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag: how late a periodic timer fires.
+
+    A coroutine that blocks the loop (e.g. tokenizing a long page inline)
+    delays every timer, so the lag is a direct measure of the stall.
+    Stalls longer than `warn_ms` are printed as they happen.
+    """
+
+    def __init__(self, warn_ms: float, interval: float = LAG_SAMPLE_INTERVAL):
+        """Sample every `interval` seconds and warn on lags of `warn_ms` or more."""
+        self.warn_ms = warn_ms
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=LAG_WINDOW)
+        self.stalls = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        """Cancel sampling; safe to call from another event loop."""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        loop = task.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is running:
+            task.cancel()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                scheduled = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag_ms = max(0.0, (loop.time() - scheduled) * 1000)
+                self.samples.append(lag_ms)
+                if lag_ms >= self.warn_ms:
+                    self.stalls += 1
+                    print(f"Event loop stalled for {lag_ms:.0f} ms")  # noqa: T201
+        except asyncio.CancelledError:
+            pass
+
+    def metrics(self) -> Dict[str, float]:
+        """Lag percentiles (ms) over the recent sample window."""
+        if not self.samples:
+            return {
+                "samples": 0,
+                "p50_ms": 0.0,
+                "p99_ms": 0.0,
+                "max_ms": 0.0,
+                "stalls": self.stalls,
+            }
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2], 2),
+            "p99_ms": round(
+                ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2
+            ),
+            "max_ms": round(ordered[-1], 2),
+            "stalls": self.stalls,
+        }
+
+
+class CPUExecutor:
+    """Runs CPU-bound text work (tokenizing, normalizing, fingerprinting) in a pool.
+
+    At most `max_pending` calls are queued or running in the pool; further
+    callers wait on the event loop instead of piling work into the pool's
+    unbounded queue.
+    """
+
+    def __init__(
+        self,
+        pool: Executor,
+        max_pending: int,
+        lag_monitor: LoopLagMonitor | None = None,
+    ):
+        """Submit work to `pool`, with at most `max_pending` calls in it."""
+        self.pool = pool
+        self.lag_monitor = lag_monitor
+        self._slots = asyncio.Semaphore(max_pending)
+        self._pending = 0
+        self.stats: Dict[str, float] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "peak_pending": 0,
+            "wait_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run `func(*args)` in the pool and return its result."""
+        loop = asyncio.get_running_loop()
+        queued_at = time.perf_counter()
+        async with self._slots:
+            started_at = time.perf_counter()
+            self.stats["wait_seconds"] += started_at - queued_at
+            self.stats["submitted"] += 1
+            self._pending += 1
+            self.stats["peak_pending"] = max(self.stats["peak_pending"], self._pending)
+            try:
+                result = await loop.run_in_executor(self.pool, func, *args)
+            except Exception:
+                self.stats["failed"] += 1
+                raise
+            finally:
+                self._pending -= 1
+                self.stats["run_seconds"] += time.perf_counter() - started_at
+            self.stats["completed"] += 1
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Executor counters plus event-loop lag, for logging."""
+        metrics: Dict[str, Any] = dict(self.stats, pending=self._pending)
+        if self.lag_monitor is not None:
+            metrics["loop_lag"] = self.lag_monitor.metrics()
+        return metrics
+
+
+def _build_pool(kind: str, max_workers: int) -> Executor:
+    if kind == "thread":
+        # tiktoken releases the GIL while encoding, so threads scale for chunking
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cpu")
+    if kind == "process":
+        # spawn, not fork: the parent runs threads (aiohttp DNS, SQLite, pools)
+        return ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    raise ValueError(f"Unknown cpu_executor '{kind}'")
+
+
+def _stop_lag_monitor(
+    executor: CPUExecutor, loop: asyncio.AbstractEventLoop | None = None
+) -> None:
+    """Stop an executor's lag monitor, e.g. once its loop is no longer current."""
+    if executor.lag_monitor is not None:
+        executor.lag_monitor.stop()
+
+
+# Pools live for the whole process. Semaphores and the lag monitor are bound
+# to an event loop, so the executors wrapping them are kept per loop, one for
+# each combination of settings in use.
+_pools: Dict[Tuple[str, int], Executor] = {}
+_executors: LoopLocalRegistry[CPUExecutor] = LoopLocalRegistry(_stop_lag_monitor)
+
+
+def get_cpu_executor(configurable: Configuration) -> CPUExecutor:
+    """Return the CPU executor for the configured settings on the running loop."""
+    pool_key = (configurable.cpu_executor, configurable.cpu_max_workers)
+    key = (*pool_key, configurable.cpu_max_pending, configurable.loop_lag_warn_ms)
+
+    def build() -> CPUExecutor:
+        if pool_key not in _pools:
+            _pools[pool_key] = _build_pool(*pool_key)
+
+        lag_monitor = None
+        if configurable.loop_lag_warn_ms > 0:
+            lag_monitor = LoopLagMonitor(warn_ms=configurable.loop_lag_warn_ms)
+            lag_monitor.start()
+
+        return CPUExecutor(
+            _pools[pool_key],
+            max_pending=configurable.cpu_max_pending,
+            lag_monitor=lag_monitor,
+        )
+
+    return _executors.get(key, build)
+
+
+async def run_cpu_bound(
+    configurable: Configuration, func: Callable[..., Any], *args: Any
+) -> Any:
+    """Run `func(*args)` on the configured CPU executor."""
+    return await get_cpu_executor(configurable).run(func, *args)
+
+
+def shutdown_cpu_executor() -> None:
+    """Stop the lag monitors and shut the pools down (call on shutdown)."""
+    for executor in _executors.clear():
+        _stop_lag_monitor(executor)
+    for pool in _pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _pools.clear()
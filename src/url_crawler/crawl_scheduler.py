@@ -0,0 +1,88 @@
+# src/url_crawler/crawl_scheduler.py
+"""Concurrency and rate limits for outgoing scrapes."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+from src.configuration import Configuration
+from src.loop_local import LoopLocalRegistry
+from src.services.url_service import URLService
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        """Start with a full bucket."""
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CrawlScheduler:
+    """Bounds outgoing scrapes globally, per origin domain, and by request rate."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        per_domain_concurrency: int,
+        requests_per_second: float,
+        burst: int,
+    ):
+        """Create the scheduler's semaphores and token bucket."""
+        self.per_domain_concurrency = per_domain_concurrency
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+        self._bucket = TokenBucket(requests_per_second, burst)
+
+    def _domain_semaphore(self, url: str) -> asyncio.Semaphore:
+        domain = URLService.extract_domain(url).lower()
+        if domain not in self._domains:
+            self._domains[domain] = asyncio.Semaphore(self.per_domain_concurrency)
+        return self._domains[domain]
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Hold a crawl slot for `url` for the duration of the block."""
+        # Take the domain slot first so one busy domain cannot hog global slots.
+        async with self._domain_semaphore(url):
+            async with self._global:
+                await self._bucket.acquire()
+                yield
+
+
+# Semaphores are bound to the loop they are used on, so schedulers are kept per
+# loop, one for each combination of crawl limits in use.
+_schedulers: LoopLocalRegistry[CrawlScheduler] = LoopLocalRegistry()
+
+
+def get_crawl_scheduler(configurable: Configuration) -> CrawlScheduler:
+    """Return the scheduler for the configured limits on the running event loop."""
+    key = (
+        configurable.crawl_max_concurrency,
+        configurable.crawl_per_domain_concurrency,
+        configurable.crawl_requests_per_second,
+        configurable.crawl_burst,
+    )
+    return _schedulers.get(key, lambda: CrawlScheduler(*key))
@@ -0,0 +1,75 @@
+# src/url_crawler/fingerprint.py
+"""SimHash fingerprints for spotting near-duplicate pages."""
+
+import hashlib
+import re
+from typing import Dict
+
+from src.services.url_service import URLService
+
+_WORD = re.compile(r"\w+")
+_MASK = (1 << 64) - 1
+
+
+def simhash(text: str, shingle_size: int = 4) -> int:
+    """64-bit SimHash of the text's word shingles."""
+    words = _WORD.findall(text.lower())
+    if not words:
+        return 0
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [
+            " ".join(words[i : i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        # blake2b is stable across processes, unlike hash()
+        h = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint & _MASK
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Count the bits that differ between two fingerprints."""
+    return (a ^ b).bit_count()
+
+
+class DuplicateDetector:
+    """Flags pages that are near-duplicates of pages already extracted in a run.
+
+    It is built per research run from the fingerprints carried in the run's
+    state (canonical URL -> SimHash), so nothing leaks between runs, claims
+    or users. A page is never a duplicate of its own URL, so replaying a
+    claim or re-reading a cached page is not mistaken for a copy.
+    """
+
+    def __init__(self, max_distance: int = 3, known: Dict[str, int] | None = None):
+        """Start from the `known` canonical URL -> fingerprint map of earlier calls."""
+        self.max_distance = max_distance
+        self.fingerprints: Dict[str, int] = dict(known or {})
+
+    def find_duplicate(self, fingerprint: int, url: str) -> str | None:
+        """Return the URL of a remembered near-duplicate of another page, if any."""
+        canonical = URLService.canonicalize_url(url)
+        for seen_url, seen in self.fingerprints.items():
+            if (
+                seen_url != canonical
+                and hamming_distance(fingerprint, seen) <= self.max_distance
+            ):
+                return seen_url
+        return None
+
+    def add(self, url: str, fingerprint: int) -> None:
+        """Remember a page's fingerprint under its canonical URL."""
+        self.fingerprints[URLService.canonicalize_url(url)] = fingerprint
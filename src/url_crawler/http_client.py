@@ -0,0 +1,86 @@
+# src/url_crawler/http_client.py
+"""Shared aiohttp session with pooled, keep-alive connections."""
+
+import asyncio
+import atexit
+
+import aiohttp
+from langchain_core.runnables import RunnableConfig
+from src.configuration import Configuration
+from src.loop_local import LoopLocalRegistry
+
+
+def _build_session(configurable: Configuration) -> aiohttp.ClientSession:
+    """Create a session with a bounded, keep-alive connector and DNS cache."""
+    connector = aiohttp.TCPConnector(
+        limit=configurable.http_max_connections,
+        limit_per_host=configurable.http_max_connections_per_host,
+        ttl_dns_cache=configurable.http_dns_cache_ttl,
+        use_dns_cache=True,
+        keepalive_timeout=configurable.http_keepalive_timeout,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=configurable.http_timeout),
+    )
+
+
+def _close_on_own_loop(
+    session: aiohttp.ClientSession, loop: asyncio.AbstractEventLoop
+) -> None:
+    """Close a session created on a previous event loop."""
+    if session.closed:
+        return
+    if loop.is_closed():
+        # Its connections died with the loop, so close() finishes without
+        # waiting; start it eagerly rather than leave a task to be cancelled
+        asyncio.Task(session.close(), loop=asyncio.get_running_loop(), eager_start=True)
+    else:
+        # Transports belong to that loop, so close them there
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+
+# One pooled session per event loop. aiohttp sessions are bound to the loop
+# they were created on (e.g. LangGraph dev server reloads, or each
+# pytest-asyncio test), so a new loop gets a new session and the old one is
+# closed.
+_sessions: LoopLocalRegistry[aiohttp.ClientSession] = LoopLocalRegistry(
+    _close_on_own_loop
+)
+
+
+async def get_http_session(
+    config: RunnableConfig | None = None,
+) -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it on first use.
+
+    Pool settings are read from the configuration the first time the session
+    is created on a given event loop; later calls reuse the same pool.
+    """
+
+    def build() -> aiohttp.ClientSession:
+        return _build_session(Configuration.from_runnable_config(config))
+
+    session = _sessions.get(None, build)
+    if session.closed:
+        _sessions.clear()
+        session = _sessions.get(None, build)
+    return session
+
+
+async def close_http_session() -> None:
+    """Close the shared session (call on shutdown)."""
+    for session in _sessions.clear():
+        await session.close()
+
+
+@atexit.register
+def _close_at_exit() -> None:
+    """Close the session at interpreter exit if its loop can still run it."""
+    loop = _sessions.loop
+    if loop is None or loop.is_running():
+        return
+    if loop.is_closed():
+        asyncio.run(close_http_session())
+    else:
+        loop.run_until_complete(close_http_session())
@@ -0,0 +1,39 @@
+# src/url_crawler/scrape_cache.py
+"""Persistent SQLite cache of scraped page content."""
+
+from src.configuration import Configuration
+from src.services.url_service import URLService
+from src.sqlite_cache import SQLiteCache
+
+
+def cache_key(url: str, max_chars: int | None = None) -> str:
+    """Cache key: the canonical URL, plus the length limit the page was read with.
+
+    Content is truncated to `max_chars` while scraping, so a page read under
+    a smaller limit must not be served to a caller allowing more.
+    """
+    canonical = URLService.canonicalize_url(url)
+    return canonical if max_chars is None else f"{canonical}|{max_chars}"
+
+
+class ScrapeCache(SQLiteCache):
+    """Store of cleaned page markdown, keyed by canonical URL and limit."""
+
+    table = "scrape_cache"
+
+    def get(self, url: str, max_chars: int | None = None) -> str | None:
+        """Return cached content for `url` read under `max_chars`, or None on a miss."""
+        return self.get_value(cache_key(url, max_chars))
+
+    def set(self, url: str, content: str, max_chars: int | None = None) -> None:
+        """Store content for `url` and evict old entries if over budget."""
+        self.set_value(cache_key(url, max_chars), content)
+
+
+def get_scrape_cache(configurable: Configuration) -> ScrapeCache:
+    """Return the process-wide cache for the configured path."""
+    return ScrapeCache.shared(
+        configurable.scrape_cache_path,
+        ttl_seconds=configurable.scrape_cache_ttl_seconds,
+        max_bytes=configurable.scrape_cache_max_mb * 1024 * 1024,
+    )
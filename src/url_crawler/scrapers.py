@@ -0,0 +1,445 @@
+# src/url_crawler/scrapers.py
+"""Scraper backends that turn a URL into page markdown."""
+
+import asyncio
+import codecs
+import ipaddress
+import os
+import re
+import socket
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import urljoin, urlsplit
+from urllib.request import url2pathname
+
+import aiohttp
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_JSON_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+_JSON_SPECIAL_CHARS = re.compile(r'["\\]')
+
+
+class JsonStringFieldExtractor:
+    """Incrementally pull one string field out of a streamed JSON document.
+
+    Text is fed in arbitrary pieces. Once the value of `field` has been fully
+    read, or `max_chars` characters of it have been decoded, `done` is set and
+    the caller can stop reading the stream.
+    """
+
+    def __init__(self, field: str, max_chars: int):
+        """Look for the string value of `field`, keeping at most `max_chars`."""
+        self.max_chars = max_chars
+        self.found = False
+        self.done = False
+        self.truncated = False
+        self._key = re.compile(rf'"{re.escape(field)}"\s*:\s*')
+        self._key_tail = len(field) + 64
+        self._buffer = ""
+        self._parts: List[str] = []
+        self._length = 0
+
+    @property
+    def value(self) -> str | None:
+        """The decoded value so far, or None if the field was never seen."""
+        return "".join(self._parts) if self.found else None
+
+    def feed(self, text: str) -> None:
+        """Consume the next piece of the document."""
+        if self.done:
+            return
+        self._buffer += text
+
+        if not self.found:
+            match = self._key.search(self._buffer)
+            if match is None or match.end() >= len(self._buffer):
+                # Keep enough of the tail to match a key split across pieces.
+                start = match.start() if match else -self._key_tail
+                self._buffer = self._buffer[start:]
+                return
+            if self._buffer[match.end()] != '"':
+                # null or a non-string value
+                self.done = True
+                return
+            self.found = True
+            self._buffer = self._buffer[match.end() + 1 :]
+
+        self._consume()
+
+    def _consume(self) -> None:
+        buf = self._buffer
+        n = len(buf)
+        i = 0
+        while i < n and not self.done:
+            match = _JSON_SPECIAL_CHARS.search(buf, i)
+            end = match.start() if match else n
+            if end > i:
+                self._append(buf[i:end])
+            i = end
+            if match is None or self.done:
+                break
+
+            if buf[end] == '"':
+                self.done = True
+                break
+
+            # Backslash escape; wait for more input if it is split.
+            if end + 1 >= n:
+                break
+            escape = buf[end + 1]
+            if escape != "u":
+                self._append(_JSON_ESCAPES.get(escape, escape))
+                i = end + 2
+                continue
+
+            if end + 6 > n:
+                break
+            code = int(buf[end + 2 : end + 6], 16)
+            i = end + 6
+            if 0xD800 <= code < 0xDC00:
+                if end + 12 > n:
+                    i = end
+                    break
+                if buf[end + 6 : end + 8] == "\\u":
+                    low = int(buf[end + 8 : end + 12], 16)
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    i = end + 12
+            self._append(chr(code))
+
+        self._buffer = buf[i:]
+
+    def _append(self, text: str) -> None:
+        remaining = self.max_chars - self._length
+        if len(text) >= remaining:
+            self.truncated = len(text) > remaining
+            self.done = True
+            text = text[:remaining]
+        self._parts.append(text)
+        self._length += len(text)
+
+
+class ScraperBackend(ABC):
+    """A way of turning a URL into markdown text."""
+
+    name: str
+    schemes: Tuple[str, ...] = ("http", "https")
+
+    @abstractmethod
+    async def scrape(
+        self, url: str, session: aiohttp.ClientSession, max_chars: int
+    ) -> str | None:
+        """Return up to `max_chars` characters of page markdown, or None."""
+
+
+class FirecrawlScraper(ScraperBackend):
+    """Scrapes through Firecrawl's hosted `/v0/scrape` endpoint."""
+
+    name = "firecrawl"
+
+    def __init__(self, base_url: str | None = None):
+        """Use `base_url`, FIRECRAWL_BASE_URL or the hosted API, in that order."""
+        base_url = base_url or os.getenv(
+            "FIRECRAWL_BASE_URL", "https://api.firecrawl.dev"
+        )
+        self.api_url = f"{base_url}/v0/scrape"
+
+    async def scrape(
+        self, url: str, session: aiohttp.ClientSession, max_chars: int
+    ) -> str | None:
+        """Stream the Firecrawl JSON response and decode only the markdown field."""
+        headers = {"Content-Type": "application/json"}
+        api_key = os.getenv("FIRECRAWL_API_KEY")
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        async with session.post(
+            self.api_url,
+            json={
+                "url": url,
+                "pageOptions": {"onlyMainContent": True},
+                "formats": ["markdown"],
+            },
+            headers=headers,
+        ) as response:
+            response.raise_for_status()
+            extractor = JsonStringFieldExtractor("markdown", max_chars)
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            async for raw in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                extractor.feed(decoder.decode(raw))
+                if extractor.done:
+                    break
+            if extractor.truncated:
+                print(  # noqa: T201
+                    f"⚠️ Content too long. Stopped reading {url} at {max_chars} chars."
+                )
+            return extractor.value
+
+
+async def check_public_host(url: str) -> None:
+    """Raise PermissionError unless the URL's host resolves only to public addresses.
+
+    Keeps server-side fetches of untrusted URLs (search results, redirects)
+    away from loopback, private, link-local and cloud metadata addresses.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise PermissionError(f"Refusing to fetch {url}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        parts.hostname, port, type=socket.SOCK_STREAM
+    )
+    for *_, sockaddr in infos:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global:
+            raise PermissionError(f"{parts.hostname} resolves to {address}")
+
+
+class DirectScraper(ScraperBackend):
+    """Fetches the page itself and converts the main content to markdown locally.
+
+    Only hosts that resolve to public addresses are fetched, and redirects
+    are followed by hand so every hop is checked. Set `allow_private_hosts`
+    to scrape an intranet or a local test server.
+    """
+
+    name = "direct"
+    schemes = ("http", "https")
+    MAX_REDIRECTS = 5
+    REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+    def __init__(self, allow_private_hosts: bool = False):
+        """Fetch public hosts only unless `allow_private_hosts` is set."""
+        self.allow_private_hosts = allow_private_hosts
+
+    # HTML carries a lot of markup per visible character, so allow more raw
+    # bytes than the character budget before giving up on the rest of the page.
+    BYTES_PER_CHAR = 8
+    MIN_BYTES = 256 * 1024
+
+    async def scrape(
+        self, url: str, session: aiohttp.ClientSession, max_chars: int
+    ) -> str | None:
+        """Fetch HTML (or plain text) and extract readable markdown."""
+        headers = {
+            "User-Agent": "Mozilla/5.0 (compatible; EventDeepResearch/1.0)",
+            "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9",
+        }
+        for _ in range(self.MAX_REDIRECTS + 1):
+            if not self.allow_private_hosts:
+                await check_public_host(url)
+            response = await session.get(url, headers=headers, allow_redirects=False)
+            location = response.headers.get("Location")
+            if response.status not in self.REDIRECT_STATUSES or not location:
+                break
+            response.release()
+            url = urljoin(str(response.url), location)
+        else:
+            raise aiohttp.TooManyRedirects(response.request_info, response.history)
+
+        async with response:
+            response.raise_for_status()
+            content_type = response.content_type or ""
+            if not (content_type.startswith("text/") or "xml" in content_type):
+                return None
+
+            byte_budget = max(max_chars * self.BYTES_PER_CHAR, self.MIN_BYTES)
+            decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(
+                errors="replace"
+            )
+            is_html = "html" in content_type
+            parser = HTMLToMarkdown() if is_html else None
+            text_parts: List[str] = []
+            read = 0
+            async for raw in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                read += len(raw)
+                text = decoder.decode(raw)
+                if parser is not None:
+                    parser.feed(text)
+                else:
+                    text_parts.append(text)
+                if read >= byte_budget:
+                    break
+
+        if parser is not None:
+            parser.close()
+            markdown = parser.markdown()
+        else:
+            markdown = "".join(text_parts).strip()
+        return markdown[:max_chars] or None
+
+
+def read_corpus_file(url: str, corpus_dir: str, max_chars: int) -> str | None:
+    """Read a `file://` document of the local search corpus as markdown.
+
+    Only files inside `corpus_dir` (after resolving `..` and symlinks) are
+    read; anything else raises PermissionError, so a search result or URL
+    can never pull arbitrary local files into a prompt.
+    """
+    if not corpus_dir:
+        raise PermissionError("file:// URLs require search_corpus_dir")
+    path = Path(url2pathname(urlsplit(url).path)).resolve()
+    if not path.is_relative_to(Path(corpus_dir).resolve()):
+        raise PermissionError(f"{path} is outside the search corpus")
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = f.read(max_chars * DirectScraper.BYTES_PER_CHAR)
+    if path.suffix.lower() in (".html", ".htm"):
+        parser = HTMLToMarkdown()
+        parser.feed(text)
+        parser.close()
+        text = parser.markdown()
+    return text.strip()[:max_chars] or None
+
+
+class HTMLToMarkdown(HTMLParser):
+    """Minimal HTML to markdown converter that keeps the main content.
+
+    Scripts, styles and page chrome (nav, header, footer, aside, forms) are
+    dropped. If the page has `<main>`, `<article>` or `role="main"`, only
+    text inside those elements is kept.
+    """
+
+    SKIP_TAGS = {
+        "script",
+        "style",
+        "noscript",
+        "template",
+        "svg",
+        "iframe",
+        "nav",
+        "header",
+        "footer",
+        "aside",
+        "form",
+        "button",
+        "select",
+    }
+    MAIN_TAGS = {"main", "article"}
+    BLOCK_TAGS = {
+        "p",
+        "div",
+        "section",
+        "li",
+        "ul",
+        "ol",
+        "tr",
+        "table",
+        "blockquote",
+        "pre",
+        "dt",
+        "dd",
+        "figcaption",
+        "br",
+        "hr",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+    }
+    VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "source", "wbr"}
+
+    def __init__(self):
+        """Start an empty document."""
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._stack: List[str] = []
+        self._prefix = ""
+        self._current: List[str] = []
+        # (text, inside_main) pairs
+        self._blocks: List[tuple[str, bool]] = []
+
+    def handle_starttag(self, tag, attrs):
+        """Open a block, or start skipping page chrome."""
+        if tag in self.VOID_TAGS:
+            if tag in ("br", "hr") and not self._skip_depth:
+                self._flush()
+            return
+
+        self._stack.append(tag)
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag in self.MAIN_TAGS or dict(attrs).get("role") == "main":
+            self._flush()
+            self._main_depth += 1
+            self._stack[-1] = f"{tag}:main"
+        if self._skip_depth:
+            return
+
+        if tag in self.BLOCK_TAGS:
+            self._flush()
+            if len(tag) == 2 and tag[0] == "h" and tag[1].isdigit():
+                self._prefix = "#" * int(tag[1]) + " "
+            elif tag == "li":
+                self._prefix = "- "
+            elif tag == "blockquote":
+                self._prefix = "> "
+        elif tag in ("td", "th") and self._current:
+            self._current.append(" | ")
+
+    def handle_endtag(self, tag):
+        """Close the element, flushing the block it ends."""
+        if tag in self.VOID_TAGS or tag not in [t.split(":")[0] for t in self._stack]:
+            return
+
+        # Pop up to and including the matching tag (tolerates unclosed tags).
+        while self._stack:
+            open_tag = self._stack.pop()
+            name, _, marker = open_tag.partition(":")
+            if name in self.SKIP_TAGS:
+                self._skip_depth -= 1
+            if marker == "main":
+                self._flush()
+                self._main_depth -= 1
+            if name == tag:
+                break
+
+        if not self._skip_depth and tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        """Collect text outside skipped elements."""
+        if self._skip_depth:
+            return
+        text = _WHITESPACE.sub(" ", data)
+        if text.strip():
+            self._current.append(text)
+
+    def _flush(self):
+        text = "".join(self._current).strip()
+        if text:
+            self._blocks.append((self._prefix + text, self._main_depth > 0))
+        self._current = []
+        self._prefix = ""
+
+    def markdown(self) -> str:
+        """Return the collected blocks as markdown paragraphs."""
+        self._flush()
+        main_blocks = [text for text, in_main in self._blocks if in_main]
+        blocks = main_blocks or [text for text, _ in self._blocks]
+        return "\n\n".join(blocks)
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+SCRAPER_BACKENDS: Dict[str, ScraperBackend] = {
+    FirecrawlScraper.name: FirecrawlScraper(),
+    DirectScraper.name: DirectScraper(),
+}
@@ -1,15 +1,13 @@
 import random
 from typing import Literal, TypedDict
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import Command
 from src.configuration import Configuration
 from src.url_crawler.utils import url_crawl
 from src.utils import get_langfuse_handler
 
-config = Configuration()
-MAX_CONTENT_LENGTH = config.max_content_length
-
 
 class InputUrlCrawlerState(TypedDict):
     url: str
@@ -25,16 +23,19 @@ class OutputUrlCrawlerState(UrlCrawlerState):
     raw_scraped_content: str
 
 
-async def scrape_content(state: UrlCrawlerState) -> Command[Literal["__end__"]]:
+async def scrape_content(
+    state: UrlCrawlerState, config: RunnableConfig
+) -> Command[Literal["__end__"]]:
     """Scrapes URL content and returns it without any processing."""
     url = state.get("url", "")
+    max_content_length = Configuration.from_runnable_config(config).max_content_length
 
-    content = await url_crawl(url)
+    content = await url_crawl(url, config)
 
-    if len(content) > MAX_CONTENT_LENGTH:
+    if len(content) > max_content_length:
         # At random start to get diverse content
-        start_index = random.randint(0, len(content) - MAX_CONTENT_LENGTH)
-        content = content[start_index : start_index + MAX_CONTENT_LENGTH]
+        start_index = random.randint(0, len(content) - max_content_length)
+        content = content[start_index : start_index + max_content_length]
 
     return Command(
         goto=END,
@@ -1,65 +1,246 @@
 import asyncio
-import os
 import re
-from typing import List
-import aiohttp
+from typing import Iterator, List, NamedTuple, Set
+from urllib.parse import urlsplit
+
 import tiktoken
+from langchain_core.runnables import RunnableConfig
+
+from src.configuration import Configuration
+from src.url_crawler.cpu_executor import run_cpu_bound
+from src.url_crawler.crawl_scheduler import get_crawl_scheduler
+from src.url_crawler.http_client import get_http_session
+from src.url_crawler.scrape_cache import get_scrape_cache
+from src.url_crawler.scrapers import SCRAPER_BACKENDS, read_corpus_file
 
-FIRECRAWL_API_URL = (
-    f"{os.getenv('FIRECRAWL_BASE_URL', 'https://api.firecrawl.dev')}/v0/scrape"
-)
 
+async def url_crawl(url: str, config: RunnableConfig | None = None) -> str:
+    """Crawls a URL and returns its content, served from the scrape cache when possible."""
+    configurable = Configuration.from_runnable_config(config)
+    cache = None if configurable.bypass_scrape_cache else get_scrape_cache(configurable)
+    max_chars = configurable.max_content_length
 
-async def url_crawl(url: str) -> str:
-    """Crawls a URL and returns its content."""
-    content = await scrape_page_content(url)
+    if cache is not None:
+        # SQLite I/O stays off the event loop
+        cached = await asyncio.to_thread(cache.get, url, max_chars)
+        if cached is not None:
+            return cached
+
+    async with get_crawl_scheduler(configurable).slot(url):
+        content = await scrape_page_content(url, config, max_chars=max_chars)
     if content is None:
         return ""
 
-    # --- 唯一保留的必要優化：物理截斷 ---
-    # 不要讓 40 萬字的文章進入後面的處理流程，直接在源頭砍斷。
-    # 20,000 字元約等於 4000-5000 tokens，這對一篇新聞報導來說綽綽有餘。
-    if len(content) > 20000:
-        print(f"⚠️ Content too long ({len(content)} chars). Truncating to 20k.")
-        content = content[:20000]
-
-    return remove_markdown_links(content)
-
-
-async def scrape_page_content(url):
-    """Scrapes URL using Firecrawl API."""
-    try:
-        headers = {"Content-Type": "application/json"}
-        api_key = os.getenv("FIRECRAWL_API_KEY")
-        if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                FIRECRAWL_API_URL,
-                json={
-                    "url": url,
-                    "pageOptions": {"onlyMainContent": True},
-                    "formats": ["markdown"],
-                },
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                return data.get("data", {}).get("markdown")
-    except Exception as e:
-        print(f"Error scraping page content: {e}")
-        return None
+    content, removed_chars = await run_cpu_bound(
+        configurable, normalize_content, content
+    )
+    if removed_chars:
+        print(f"Normalized {url}: removed {removed_chars} chars of markup/boilerplate.")  # noqa: T201
+    if cache is not None and content:
+        await asyncio.to_thread(cache.set, url, content, max_chars)
+    return content
+
+
+async def scrape_page_content(
+    url, config: RunnableConfig | None = None, max_chars: int | None = None
+):
+    """Scrapes URL with the configured backends, falling back in order.
+
+    Each backend streams the page and stops reading once `max_chars`
+    characters of content are available.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    if max_chars is None:
+        max_chars = configurable.max_content_length
+
+    scheme = urlsplit(url).scheme.lower()
+    if scheme == "file":
+        # Documents of the local search corpus, never other local files
+        try:
+            return await asyncio.to_thread(
+                read_corpus_file, url, configurable.search_corpus_dir, max_chars
+            )
+        except OSError as e:
+            print(f"Error reading local document {url}: {e}")  # noqa: T201
+            return None
+
+    session = await get_http_session(config)
+    for name in configurable.get_scraper_backends():
+        backend = SCRAPER_BACKENDS.get(name)
+        if backend is None:
+            print(f"Unknown scraper backend '{name}', skipping.")  # noqa: T201
+            continue
+        if scheme not in backend.schemes:
+            continue
+        try:
+            content = await backend.scrape(url, session, max_chars)
+        except Exception as e:
+            print(f"Error scraping page content with {name}: {e}")  # noqa: T201
+            continue
+        if content:
+            return content
 
+    return None
+
+
+class NormalizedContent(NamedTuple):
+    """Cleaned page text and how many characters cleaning removed."""
+
+    text: str
+    removed_chars: int
+
+
+# Inline markup, matched in one alternation: linked images, images, links
+# (keep the text), HTML tags, and emphasis/code markers.
+_INLINE_MARKUP = re.compile(
+    r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)"
+    r"|!\[[^\]]*\]\([^)]*\)"
+    r"|\[([^\[\]]*)\]\([^)]*\)"
+    r"|</?[a-zA-Z][^>\n]*>"
+    r"|\*\*|__|`"
+)
+_LINK = re.compile(r"\[[^\[\]]*\]\([^)]*\)")
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_NAV_SEPARATORS = re.compile(r"[\s|•·»>/*+\-]+")
+# Whole lines that are site chrome: cookie banners, copyright footers, share
+# and follow prompts. Matched against the full line, so prose that merely
+# mentions cookies or sharing is kept.
+_BOILERPLATE_LINE = re.compile(
+    r"(?:we|this (?:site|website)) uses? cookies\b.*"
+    r"|(?:accept|reject|manage) (?:all|cookies|all cookies|cookie settings)\.?"
+    r"|(?:©|\(c\)|copyright)\s*(?:\d{4}|[^.]{0,60}\d{4})\b.*"
+    r"|all rights reserved\.?|privacy policy|terms of (?:use|service)"
+    r"|skip to (?:main )?content|back to top|advertisement"
+    r"|(?:subscribe to|sign up for) (?:our|the) newsletter\b.*"
+    r"|log ?in(?: to [\w ]{1,30})?|share(?: this(?: \w+)?| on \w+)?:?|follow us(?: on \w+)?:?"
+    r"|related (?:articles|stories|posts):?|read more:.*",
+    re.IGNORECASE,
+)
+_REFERENCE_HEADINGS = re.compile(
+    r"^(?:references|bibliography|external links|see also|further reading"
+    r"|footnotes|notes|sources|citations|related articles)\s*:?\s*$",
+    re.IGNORECASE,
+)
+# A line that reads like a citation: a link or URL, a DOI, "et al.", or a
+# numbered/bulleted entry with a year.
+_CITATION = re.compile(
+    r"\]\(|https?://|www\.|\bdoi\b|\bet al\b"
+    r"|^(?:[*+\-]|\d+[.)]|\[\d+\])\s.*\b(?:1[89]|20)\d{2}\b",
+    re.IGNORECASE,
+)
+# A reference-headed section is only dropped when this share of its lines
+# are citations; a "Sources" or "Notes" section written as prose is kept.
+_CITATION_SHARE = 2 / 3
+# Boilerplate lines are short; long paragraphs are always kept.
+_BOILERPLATE_MAX_LINE = 200
+# Lines that are a single link and little else; three in a row is a menu.
+_MENU_RUN = 3
 
-def remove_markdown_links(markdown_text):
-    return re.sub(r"\[(.*?)\]\(.*?\)", r"\1", markdown_text)
+
+def _keep_link_text(match: re.Match) -> str:
+    return match.group(1) or ""
+
+
+def _reference_lines(lines: List[str]) -> Set[int]:
+    """Return the indices of lines in reference sections made mostly of citations."""
+    drop: Set[int] = set()
+    i = 0
+    while i < len(lines):
+        heading = _HEADING.match(lines[i].strip())
+        title = heading and _INLINE_MARKUP.sub(_keep_link_text, heading.group(2))
+        if not (heading and _REFERENCE_HEADINGS.match(title.strip())):
+            i += 1
+            continue
+
+        level = len(heading.group(1))
+        end = i + 1
+        while end < len(lines):
+            sub = _HEADING.match(lines[end].strip())
+            if sub and len(sub.group(1)) <= level:
+                break
+            end += 1
+
+        body = [
+            line.strip()
+            for line in lines[i + 1 : end]
+            if line.strip() and not _HEADING.match(line.strip())
+        ]
+        cited = sum(1 for line in body if _CITATION.search(line))
+        if cited >= len(body) * _CITATION_SHARE:
+            drop.update(range(i, end))
+        i = end
+    return drop
+
+
+def normalize_content(markdown_text: str) -> NormalizedContent:
+    """Clean scraped markdown line by line.
+
+    Removes links (keeping their text), images, HTML tags and emphasis
+    markers; drops navigation menus, whole-line cookie/share/footer
+    boilerplate and reference sections made of citations; collapses
+    whitespace. Returns the text together with the number of characters
+    removed.
+    """
+    if not markdown_text:
+        return NormalizedContent("", 0)
+
+    out: List[str] = []
+    menu_run: List[str] = []
+    lines = markdown_text.splitlines()
+    references = _reference_lines(lines)
+
+    def flush_menu():
+        if len(menu_run) < _MENU_RUN:
+            out.extend(menu_run)
+        menu_run.clear()
+
+    for index, raw_line in enumerate(lines):
+        if index in references:
+            continue
+        line = _SPACES.sub(" ", raw_line).strip()
+
+        if not line:
+            flush_menu()
+            if out and out[-1]:
+                out.append("")
+            continue
+
+        if len(line) < _BOILERPLATE_MAX_LINE and _BOILERPLATE_LINE.fullmatch(
+            _INLINE_MARKUP.sub(_keep_link_text, line).strip()
+        ):
+            continue
+
+        links = _LINK.findall(line)
+        if links:
+            rest = _NAV_SEPARATORS.sub("", _LINK.sub("", line))
+            if len(links) >= 2 and len(rest) < 16:
+                # A row of links: a navigation bar or breadcrumb.
+                continue
+            if len(links) == 1 and not rest:
+                menu_run.append(_INLINE_MARKUP.sub(_keep_link_text, line))
+                continue
+
+        flush_menu()
+        line = _INLINE_MARKUP.sub(_keep_link_text, line).strip()
+        if line:
+            out.append(line)
+
+    flush_menu()
+    text = "\n".join(out).strip()
+    return NormalizedContent(text, len(markdown_text) - len(text))
 
 
 # Global tokenizer cache
 _tokenizer = None
 
+# Rough upper bound of characters per token, used to size the text prefix that
+# is encoded when only the first few chunks are needed
+_CHARS_PER_TOKEN = 6
+# Tokens kept beyond the last needed one. A prefix cut can change how the final
+# word is tokenized, so tokens this close to the cut are never used
+_BOUNDARY_TOKENS = 64
+
 
 def get_tokenizer():
     global _tokenizer
@@ -68,33 +249,173 @@ def get_tokenizer():
     return _tokenizer
 
 
-# FIXED: 完全移除多線程 (asyncio.to_thread)，回到最原本的同步寫法
-async def chunk_text_by_tokens(
-    text: str, chunk_size: int = 1000, overlap_size: int = 20
-) -> List[str]:
-    """Splits text into token-based chunks synchronously."""
-    if not text:
-        return []
+def _tokens_needed(
+    chunk_size: int, overlap_size: int, max_chunks: int | None
+) -> int | None:
+    """Tokens covering the first `max_chunks` chunks, or None for all of them."""
+    if max_chunks is None:
+        return None
+    return chunk_size + (max_chunks - 1) * (chunk_size - overlap_size)
 
-    # 直接計算，雖然會卡住 Main Loop 0.01秒，但絕對不會報錯
-    encoding = get_tokenizer()
-    tokens = encoding.encode(text)
 
-    print(f"--- TOKENS: {len(tokens)} ---")
+def _prefix_budget(needed: int) -> int:
+    return (needed + _BOUNDARY_TOKENS) * _CHARS_PER_TOKEN
+
+
+def _stable_prefix(tokens: List[int], text_len: int, prefix_len: int, needed: int):
+    """Return the first `needed` tokens if the prefix was long enough to trust them, else None."""
+    if prefix_len >= text_len:
+        return tokens
+    if len(tokens) >= needed + _BOUNDARY_TOKENS:
+        return tokens[:needed]
+    return None
+
+
+def _encode_prefix(encoding, text: str, needed: int | None) -> List[int]:
+    """Encode only as much of `text` as the first `needed` tokens require."""
+    if needed is None:
+        return encoding.encode(text)
+
+    budget = _prefix_budget(needed)
+    while True:
+        prefix = text[:budget]
+        tokens = _stable_prefix(encoding.encode(prefix), len(text), len(prefix), needed)
+        if tokens is not None:
+            return tokens
+        budget *= 2
 
-    chunks = []
+
+def _decode_chunks(
+    encoding,
+    tokens: List[int],
+    chunk_size: int,
+    overlap_size: int,
+    max_chunks: int | None,
+) -> Iterator[str]:
+    produced = 0
     start_index = 0
     while start_index < len(tokens):
-        end_index = start_index + chunk_size
-        chunk_tokens = tokens[start_index:end_index]
-        chunks.append(encoding.decode(chunk_tokens))
+        if max_chunks is not None and produced >= max_chunks:
+            return
+        yield encoding.decode(tokens[start_index : start_index + chunk_size])
+        produced += 1
         start_index += chunk_size - overlap_size
 
+
+def iter_token_chunks(
+    text: str,
+    chunk_size: int = 1000,
+    overlap_size: int = 20,
+    max_chunks: int | None = None,
+) -> Iterator[str]:
+    """Lazily yield token-based chunks of `text`.
+
+    With `max_chunks`, only the text prefix those chunks cover is encoded and
+    nothing past the last chunk is decoded.
+    """
+    if not text or (max_chunks is not None and max_chunks <= 0):
+        return
+    if overlap_size >= chunk_size:
+        raise ValueError("overlap_size must be smaller than chunk_size")
+
+    encoding = get_tokenizer()
+    needed = _tokens_needed(chunk_size, overlap_size, max_chunks)
+    tokens = _encode_prefix(encoding, text, needed)
+    yield from _decode_chunks(encoding, tokens, chunk_size, overlap_size, max_chunks)
+
+
+def chunk_texts(
+    texts: List[str],
+    chunk_size: int = 1000,
+    overlap_size: int = 20,
+    max_chunks: int | None = None,
+) -> List[List[str]]:
+    """Chunk many documents, encoding them together with `encode_batch`."""
+    if max_chunks is not None and max_chunks <= 0:
+        return [[] for _ in texts]
+    if overlap_size >= chunk_size:
+        raise ValueError("overlap_size must be smaller than chunk_size")
+
+    encoding = get_tokenizer()
+    needed = _tokens_needed(chunk_size, overlap_size, max_chunks)
+    prefixes = (
+        texts if needed is None else [text[: _prefix_budget(needed)] for text in texts]
+    )
+
+    results = []
+    for text, prefix, tokens in zip(texts, prefixes, encoding.encode_batch(prefixes)):
+        if needed is not None:
+            tokens = _stable_prefix(tokens, len(text), len(prefix), needed)
+            if tokens is None:
+                # Unusually dense text: grow this document's prefix on its own
+                tokens = _encode_prefix(encoding, text, needed)
+        results.append(
+            list(_decode_chunks(encoding, tokens, chunk_size, overlap_size, max_chunks))
+        )
+    return results
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = 1000,
+    overlap_size: int = 20,
+    max_chunks: int | None = None,
+) -> List[str]:
+    """Chunk one document; the blocking counterpart of chunk_text_by_tokens."""
+    return list(iter_token_chunks(text, chunk_size, overlap_size, max_chunks))
+
+
+async def chunk_text_by_tokens(
+    text: str,
+    chunk_size: int = 1000,
+    overlap_size: int = 20,
+    max_chunks: int | None = None,
+    config: RunnableConfig | None = None,
+) -> List[str]:
+    """Splits text into token-based chunks on the CPU executor, stopping after `max_chunks`."""
+    if not text:
+        return []
+
+    chunks = await run_cpu_bound(
+        Configuration.from_runnable_config(config),
+        chunk_text,
+        text,
+        chunk_size,
+        overlap_size,
+        max_chunks,
+    )
+
     print(f"--- Generated {len(chunks)} chunks ---")
     return chunks
 
 
-async def count_tokens(messages: List[str]) -> int:
-    encoding = get_tokenizer()
-    combined = "".join(messages)
-    return len(encoding.encode(combined))
+async def chunk_texts_by_tokens(
+    texts: List[str],
+    chunk_size: int = 1000,
+    overlap_size: int = 20,
+    max_chunks: int | None = None,
+    config: RunnableConfig | None = None,
+) -> List[List[str]]:
+    """Chunk many documents in one batch on the CPU executor."""
+    if not texts:
+        return []
+    return await run_cpu_bound(
+        Configuration.from_runnable_config(config),
+        chunk_texts,
+        texts,
+        chunk_size,
+        overlap_size,
+        max_chunks,
+    )
+
+
+def _count_tokens(text: str) -> int:
+    return len(get_tokenizer().encode(text))
+
+
+async def count_tokens(
+    messages: List[str], config: RunnableConfig | None = None
+) -> int:
+    return await run_cpu_bound(
+        Configuration.from_runnable_config(config), _count_tokens, "".join(messages)
+    )